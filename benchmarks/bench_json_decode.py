@@ -0,0 +1,64 @@
+"""Micro-benchmark: str-based vs bytes-based JSON decoding of pool details.
+
+Compares the previous ``response.text()`` + ``json.loads(text)`` path with
+``api.json_loads(body)`` (orjson when installed, stdlib otherwise) on a
+multi-pool GetPoolDetails payload.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json_decode
+"""
+import json
+import timeit
+from pathlib import Path
+
+from custom_components.klereo import api
+
+PAYLOAD = Path(__file__).parent / "data" / "pool_details_multi.json"
+ROUNDS = 200
+
+
+def _bodies() -> list[bytes]:
+    """Return one wire-format response body per pool."""
+    data = json.loads(PAYLOAD.read_bytes())
+    return [json.dumps(pool, separators=(",", ":")).encode() for pool in data["pools"]]
+
+
+def _decode_text(bodies: list[bytes]) -> None:
+    """Previous path: decode to str, then parse the str."""
+    for body in bodies:
+        json.loads(body.decode("utf-8"))
+
+
+def _decode_stdlib_bytes(bodies: list[bytes]) -> None:
+    """Stdlib json parsing bytes directly."""
+    for body in bodies:
+        json.loads(body)
+
+
+def _decode_api(bodies: list[bytes]) -> None:
+    """Current path: api.json_loads on the raw bytes."""
+    for body in bodies:
+        api.json_loads(body)
+
+
+def main() -> None:
+    """Run the benchmark and print per-poll timings."""
+    bodies = _bodies()
+    size = sum(len(body) for body in bodies)
+    print(f"{len(bodies)} pools, {size / 1024:.1f} KiB per poll, {ROUNDS} rounds")
+    print(f"orjson: {'yes' if api.orjson is not None else 'no (stdlib fallback)'}")
+
+    baseline = None
+    for label, func in (
+        ("text + json.loads", _decode_text),
+        ("bytes + json.loads", _decode_stdlib_bytes),
+        ("api.json_loads", _decode_api),
+    ):
+        best = min(timeit.repeat(lambda f=func: f(bodies), number=ROUNDS, repeat=5)) / ROUNDS
+        baseline = baseline or best
+        print(f"{label:<20} {best * 1e6:9.1f} µs/poll  {baseline / best:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
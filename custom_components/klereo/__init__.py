@@ -1,19 +1,129 @@
 """The Klereo integration."""
+import asyncio
 import logging
+from typing import Any
 
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .api import KlereoApi
-from .const import DOMAIN, SCAN_INTERVAL_MINUTES, hash_password
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+
+from .api import OUT_STATE_OFF, OUT_STATE_ON, OUTPUT_MODES, KlereoApi
+from .const import (
+    ATTR_OUTPUTS,
+    ATTR_PARAMS,
+    ATTR_SYSTEM_ID,
+    CONF_ADAPTIVE_POLLING,
+    CONF_ALIGN_POLLS,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_DEADBAND,
+    CONF_KEEP_RAW_PAYLOADS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_NUMBER_DEBOUNCE,
+    CONF_POLL_MODE,
+    CONF_PRECISION,
+    CONF_SENSOR_HEARTBEAT,
+    CONF_SYSTEM_LIST_TTL,
+    CONF_VERIFY_DELAY,
+    CONFIRM_TIMEOUT_SECONDS,
+    DOMAIN,
+    MAX_SCAN_INTERVAL_MINUTES,
+    MAX_STALENESS_MINUTES,
+    MIN_SCAN_INTERVAL_MINUTES,
+    NUMBER_DEBOUNCE_SECONDS,
+    POLL_MODE_FULL,
+    SCAN_INTERVAL_MINUTES,
+    SENSOR_HEARTBEAT_MINUTES,
+    SENSOR_TYPES,
+    SERVICE_APPLY,
+    SERVICE_REFRESH_SYSTEMS,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    SYSTEM_LIST_TTL_MINUTES,
+    TOKEN_SAVE_DELAY,
+    VERIFY_DELAY_SECONDS,
+    hash_password,
+)
 from .coordinator import KlereoCoordinator
+from .models import COMMAND_OUTPUT, COMMAND_PARAM, KlereoCommand
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.NUMBER, Platform.SELECT, Platform.SENSOR, Platform.SWITCH]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+APPLY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_OUTPUTS, default=list): [
+            vol.Schema(
+                {
+                    vol.Required(ATTR_SYSTEM_ID): cv.string,
+                    vol.Required("index"): vol.Coerce(int),
+                    vol.Required("mode"): vol.All(vol.Coerce(int), vol.In(OUTPUT_MODES)),
+                    vol.Required("state"): vol.All(
+                        vol.Coerce(int), vol.In((OUT_STATE_OFF, OUT_STATE_ON))
+                    ),
+                }
+            )
+        ],
+        vol.Optional(ATTR_PARAMS, default=list): [
+            vol.Schema(
+                {
+                    vol.Required(ATTR_SYSTEM_ID): cv.string,
+                    vol.Required("key"): cv.string,
+                    # Keep integer RegulModes (e.g. filtration modes) integers.
+                    vol.Required("value"): vol.Any(int, float, cv.string),
+                }
+            )
+        ],
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the Klereo services."""
+
+    async def _async_refresh_systems(call: ServiceCall) -> None:
+        """Re-read the system list of every configured account."""
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            await coordinator.async_refresh_systems()
+
+    async def _async_apply(call: ServiceCall) -> None:
+        """Apply output and parameter changes across one or more pools."""
+        commands = [
+            (item[ATTR_SYSTEM_ID], KlereoCommand(COMMAND_OUTPUT, item["index"], (item["mode"], item["state"])))
+            for item in call.data[ATTR_OUTPUTS]
+        ] + [
+            (item[ATTR_SYSTEM_ID], KlereoCommand(COMMAND_PARAM, item["key"], item["value"]))
+            for item in call.data[ATTR_PARAMS]
+        ]
+        batches: dict[KlereoCoordinator, list[tuple[str, KlereoCommand]]] = {}
+        for system_id, command in commands:
+            coordinator = next(
+                (
+                    coordinator
+                    for coordinator in hass.data.get(DOMAIN, {}).values()
+                    if system_id in coordinator.system_coordinators
+                ),
+                None,
+            )
+            if coordinator is None:
+                raise HomeAssistantError(f"Unknown Klereo system {system_id}")
+            batches.setdefault(coordinator, []).append((system_id, command))
+        await asyncio.gather(*(coordinator.async_apply(batch) for coordinator, batch in batches.items()))
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH_SYSTEMS, _async_refresh_systems)
+    hass.services.async_register(DOMAIN, SERVICE_APPLY, _async_apply, schema=APPLY_SCHEMA)
+    return True
+
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Migrate config entry to current version."""
@@ -36,10 +146,56 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
 
     session = async_get_clientsession(hass)
-    api = KlereoApi(entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], session)
+    store = _token_store(hass, entry)
+
+    @callback
+    def _save_token(token: str, expires_at: float | None) -> None:
+        store.async_delay_save(
+            lambda: {
+                CONF_USERNAME: entry.data[CONF_USERNAME],
+                "token": token,
+                "expires_at": expires_at,
+            },
+            TOKEN_SAVE_DELAY,
+        )
+
+    api = KlereoApi(
+        entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], session, token_listener=_save_token
+    )
+    entry.async_on_unload(api.close)
+
+    # Reuse the session token from the previous run so the first refresh
+    # can skip the GetJWT.php round trip.
+    stored = await store.async_load()
+    if stored and stored.get(CONF_USERNAME) == entry.data[CONF_USERNAME] and stored.get("token"):
+        if api.restore_token(stored["token"], stored.get("expires_at")):
+            _LOGGER.debug("Restored Klereo session token from storage")
 
     scan_interval = entry.options.get("scan_interval", SCAN_INTERVAL_MINUTES)
-    coordinator = KlereoCoordinator(hass, api, scan_interval=scan_interval)
+    coordinator = KlereoCoordinator(
+        hass,
+        api,
+        scan_interval=scan_interval,
+        poll_mode=entry.options.get(CONF_POLL_MODE, POLL_MODE_FULL),
+        max_staleness=entry.options.get(CONF_MAX_STALENESS, MAX_STALENESS_MINUTES),
+        system_list_ttl=entry.options.get(CONF_SYSTEM_LIST_TTL, SYSTEM_LIST_TTL_MINUTES),
+        adaptive_polling=entry.options.get(CONF_ADAPTIVE_POLLING, False),
+        min_scan_interval=entry.options.get(CONF_MIN_SCAN_INTERVAL, MIN_SCAN_INTERVAL_MINUTES),
+        max_scan_interval=entry.options.get(CONF_MAX_SCAN_INTERVAL, MAX_SCAN_INTERVAL_MINUTES),
+        align_polls=entry.options.get(CONF_ALIGN_POLLS, False),
+        verify_delay=entry.options.get(CONF_VERIFY_DELAY, VERIFY_DELAY_SECONDS),
+        confirm_timeout=entry.options.get(CONF_CONFIRM_TIMEOUT, CONFIRM_TIMEOUT_SECONDS),
+        number_debounce=entry.options.get(CONF_NUMBER_DEBOUNCE, NUMBER_DEBOUNCE_SECONDS),
+        sensor_filters={
+            probe_type: (
+                entry.options.get(CONF_DEADBAND.format(probe_type), sensor_def["deadband"]),
+                entry.options.get(CONF_PRECISION.format(probe_type), sensor_def["precision"]),
+            )
+            for probe_type, sensor_def in SENSOR_TYPES.items()
+        },
+        sensor_heartbeat=entry.options.get(CONF_SENSOR_HEARTBEAT, SENSOR_HEARTBEAT_MINUTES),
+        keep_raw_payloads=entry.options.get(CONF_KEEP_RAW_PAYLOADS, False),
+    )
     await coordinator.async_config_entry_first_refresh()
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -59,6 +215,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted session token when the entry is deleted."""
+    await _token_store(hass, entry).async_remove()
+
+
+def _token_store(hass: HomeAssistant, entry: ConfigEntry) -> Store[dict[str, Any]]:
+    """Return the session token store for a config entry."""
+    return Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id), private=True)
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload integration when options change."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -1,11 +1,23 @@
 """API Client for Klereo."""
 import asyncio
+import base64
+import binascii
 import json
 import logging
+import random
+import time
+from collections import deque
+from collections.abc import Callable
 from typing import Any
+from urllib.parse import urlsplit
 
 import aiohttp
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
 _LOGGER = logging.getLogger(__name__)
 
 # API wire constants
@@ -16,12 +28,40 @@ API_URL_GET_POOL_DETAILS = f"{API_URL_BASE}/GetPoolDetails.php"
 API_URL_SET_OUT = f"{API_URL_BASE}/SetOut.php"
 API_URL_SET_PARAM = f"{API_URL_BASE}/SetParam.php"
 
+# Endpoints with side effects — never coalesced with concurrent callers
+WRITE_URLS = frozenset({API_URL_SET_OUT, API_URL_SET_PARAM})
+
 API_VERSION = "393-J"
 API_COM_MODE = 1
 
 TIMEOUT = 10
 USER_AGENT = "Jeedom plugin"
 
+# Token lifecycle: renew in the background this many seconds before the JWT
+# expires, and treat it as already expired within the skew window.
+TOKEN_RENEW_MARGIN = 300
+# Seconds before retrying a failed background renewal
+TOKEN_RENEW_RETRY = 60
+TOKEN_EXPIRY_SKEW = 30
+
+# Transient-error retries: full-jitter exponential backoff
+RETRY_ATTEMPTS = 2
+RETRY_BACKOFF_BASE = 2.0
+RETRY_BACKOFF_MAX = 30.0
+
+# Per-endpoint circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 60.0
+CIRCUIT_RESET_TIMEOUT_MAX = 1800.0
+
+# Client-side rate limit per host, shared by every KlereoApi instance
+RATE_LIMIT_PER_SECOND = 2.0
+RATE_LIMIT_BURST = 5
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
 # Output modes (from Jeedom plugin _OUT_MODE_* constants)
 OUT_MODE_MAN = 0
 OUT_MODE_TIME_SLOTS = 1
@@ -45,24 +85,260 @@ class KlereoApiError(Exception):
     """Error from the Klereo API."""
 
 
+class KlereoCircuitOpenError(KlereoApiError):
+    """An endpoint's circuit breaker is open; the call was not attempted."""
+
+    def __init__(self, url: str, retry_after: float) -> None:
+        """Initialize with the seconds left until the next probe is allowed."""
+        super().__init__(f"Circuit open for {url}, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Circuit breaker for a single API endpoint.
+
+    Opens after ``failure_threshold`` consecutive failed requests. After the
+    reset timeout a single half-open probe is let through: success closes
+    the circuit, failure re-opens it with a doubled timeout.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize a closed circuit."""
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the next half-open probe is allowed."""
+        if self.state != CIRCUIT_OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self, url: str) -> bool:
+        """Admit a call, returning True if it is the half-open probe.
+
+        Raises KlereoCircuitOpenError if the call must not be attempted.
+        """
+        if self.state == CIRCUIT_OPEN:
+            if self.retry_after > 0:
+                raise KlereoCircuitOpenError(url, self.retry_after)
+            self.state = CIRCUIT_HALF_OPEN
+            _LOGGER.debug("Circuit for %s half-open, probing", url)
+        if self.state == CIRCUIT_HALF_OPEN:
+            if self._probe_in_flight:
+                raise KlereoCircuitOpenError(url, 0.0)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.reset_timeout = self.base_reset_timeout
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold."""
+        if self.state == CIRCUIT_HALF_OPEN:
+            self.reset_timeout = min(self.reset_timeout * 2, CIRCUIT_RESET_TIMEOUT_MAX)
+        else:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return
+        self.state = CIRCUIT_OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Allow a new probe if the current one ended without a verdict."""
+        self._probe_in_flight = False
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "reset_timeout": self.reset_timeout,
+            "retry_after": round(self.retry_after, 1),
+        }
+
+
+def json_loads(body: bytes) -> Any:
+    """Decode a JSON response body straight from bytes.
+
+    Uses orjson when it is installed, falling back to the stdlib decoder.
+    Both raise a ValueError subclass on malformed input.
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_body(body: bytes, url: str) -> Any:
+    """Decode a JSON response body, raising KlereoApiError if malformed."""
+    try:
+        return json_loads(body)
+    except ValueError as err:
+        _LOGGER.error(
+            "Invalid JSON from %s: %s", url, body[:200].decode("utf-8", "replace")
+        )
+        raise KlereoApiError(f"Invalid JSON response from {url}") from err
+
+
+class RateLimiter:
+    """Token bucket limiting the request rate to one host.
+
+    Priority acquires (commands, logins) are served before queued polling
+    reads, so interactive latency stays low while a poll burst drains.
+    """
+
+    def __init__(
+        self, rate: float = RATE_LIMIT_PER_SECOND, burst: int = RATE_LIMIT_BURST
+    ) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        # Waiter queues in service order: priority first, then normal.
+        self._queues: tuple[deque[asyncio.Future], deque[asyncio.Future]] = (deque(), deque())
+        self._drain_task: asyncio.Task | None = None
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: bool = False) -> None:
+        """Wait for a token."""
+        priority_queue, normal_queue = self._queues
+        self._refill()
+        if self._tokens >= 1 and not priority_queue and (priority or not normal_queue):
+            self._tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        (priority_queue if priority else normal_queue).append(future)
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self) -> None:
+        """Hand out tokens to queued waiters as they accrue."""
+        while True:
+            for queue in self._queues:
+                while queue and queue[0].done():
+                    queue.popleft()  # waiter was cancelled
+            queue = next((q for q in self._queues if q), None)
+            if queue is None:
+                return
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            self._tokens -= 1
+            queue.popleft().set_result(None)
+
+
+_RATE_LIMITERS: dict[str, RateLimiter] = {}
+
+
+def _breaker_key(url: str, data: dict[str, Any] | None) -> str:
+    """Return the circuit breaker key for a request.
+
+    Pool-scoped calls get one breaker per pool, so a pool whose controller
+    keeps failing does not make every other pool's requests fail fast.
+    """
+    if data and "poolID" in data:
+        return f"{url}?poolID={data['poolID']}"
+    return url
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """Return the rate limiter shared by all clients for the URL's host."""
+    host = urlsplit(url).hostname or ""
+    if host not in _RATE_LIMITERS:
+        _RATE_LIMITERS[host] = RateLimiter()
+    return _RATE_LIMITERS[host]
+
+
+def decode_jwt_expiry(token: str) -> float | None:
+    """Return the ``exp`` claim of a JWT as a Unix timestamp, if present.
+
+    The signature is not verified — the value is only used to schedule
+    renewal, the server remains the authority on token validity.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
 class KlereoApi:
     """Klereo API Client."""
 
-    def __init__(self, username: str, password_hash: str, session: aiohttp.ClientSession):
+    def __init__(
+        self,
+        username: str,
+        password_hash: str,
+        session: aiohttp.ClientSession,
+        token_listener: Callable[[str, float | None], None] | None = None,
+        *,
+        retry_attempts: int = RETRY_ATTEMPTS,
+        backoff_base: float = RETRY_BACKOFF_BASE,
+        backoff_max: float = RETRY_BACKOFF_MAX,
+        circuit_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        circuit_reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ):
         """Initialize the API client.
 
         Args:
             password_hash: SHA-1 hex digest of the password.
+            token_listener: Called with (token, expires_at) after every
+                successful login, e.g. to persist the session token.
+            retry_attempts: Retries after a transient error.
+            backoff_base: Backoff cap in seconds for the first retry; doubles
+                on each further retry up to ``backoff_max``.
+            circuit_threshold: Consecutive failures that open an endpoint's
+                circuit.
+            circuit_reset_timeout: Seconds an open circuit waits before the
+                first half-open probe.
         """
         self._username = username
         self._password_hash = password_hash
         self._session = session
+        self._token_listener = token_listener
         self._token: str | None = None
+        self._token_expires_at: float | None = None
         self._auth_lock = asyncio.Lock()
+        self._renew_task: asyncio.Task | None = None
+        self._renew_handle: asyncio.TimerHandle | None = None
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._retry_attempts = retry_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._circuit_threshold = circuit_threshold
+        self._circuit_reset_timeout = circuit_reset_timeout
+        self.circuit_breakers: dict[str, CircuitBreaker] = {}
 
     async def login(self) -> None:
         """Authenticate with the Klereo API and obtain a JWT token."""
         _LOGGER.debug("Logging in to Klereo API")
+        await get_rate_limiter(API_URL_LOGIN).acquire(priority=True)
         try:
             async with asyncio.timeout(TIMEOUT):
                 response = await self._session.post(
@@ -91,65 +367,216 @@ class KlereoApi:
             _LOGGER.error("Login failed: no token in API response")
             _LOGGER.debug("Login response body: %s", data)
             raise KlereoApiError("Login failed: no token returned")
+        self._token_expires_at = decode_jwt_expiry(self._token)
+        self._schedule_renewal()
+        if self._token_listener is not None:
+            self._token_listener(self._token, self._token_expires_at)
+
+    def restore_token(self, token: str, expires_at: float | None) -> bool:
+        """Reuse a previously issued token, skipping the initial login.
+
+        Returns False (and keeps no token) if it has already expired.
+        """
+        self._token = token
+        self._token_expires_at = expires_at
+        if not self._token_valid():
+            self._token = None
+            self._token_expires_at = None
+            return False
+        self._schedule_renewal()
+        return True
+
+    def _schedule_renewal(self, delay: float | None = None) -> None:
+        """Arm a timer that renews the token TOKEN_RENEW_MARGIN before expiry.
+
+        Renewal then happens even when no request falls inside the margin.
+        """
+        if self._renew_handle is not None:
+            self._renew_handle.cancel()
+            self._renew_handle = None
+        if self._token_expires_at is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if delay is None:
+            delay = self._token_expires_at - TOKEN_RENEW_MARGIN - time.time()
+        self._renew_handle = loop.call_later(max(delay, 0), self._start_renewal)
+
+    def _start_renewal(self) -> None:
+        """Start a background renewal unless one is already running."""
+        self._renew_handle = None
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.create_task(self._renew_token())
+
+    def close(self) -> None:
+        """Cancel the renewal timer and any renewal in progress."""
+        if self._renew_handle is not None:
+            self._renew_handle.cancel()
+            self._renew_handle = None
+        if self._renew_task is not None:
+            self._renew_task.cancel()
+            self._renew_task = None
+
+    def _token_valid(self) -> bool:
+        """Return True if a token is held and not (about to be) expired."""
+        if not self._token:
+            return False
+        if self._token_expires_at is None:
+            return True
+        return time.time() < self._token_expires_at - TOKEN_EXPIRY_SKEW
+
+    def _token_needs_renewal(self) -> bool:
+        """Return True if the token is within the background renewal margin."""
+        if self._token_expires_at is None:
+            return False
+        return time.time() >= self._token_expires_at - TOKEN_RENEW_MARGIN
+
+    async def _renew_token(self) -> None:
+        """Renew the token ahead of expiry without blocking callers."""
+        async with self._auth_lock:
+            if not self._token_needs_renewal():
+                return
+            _LOGGER.debug("Token expires soon, renewing in the background")
+            try:
+                await self.login()
+            except (aiohttp.ClientError, TimeoutError, KlereoApiError) as err:
+                # The current token is still usable; try again shortly.
+                _LOGGER.debug("Background token renewal failed: %s", err)
+                if self._token_valid():
+                    self._schedule_renewal(TOKEN_RENEW_RETRY)
 
     async def _get_auth_header(self) -> dict[str, str]:
         """Get the authorization header, logging in if necessary."""
-        if not self._token:
+        if not self._token_valid():
             async with self._auth_lock:
-                if not self._token:
+                if not self._token_valid():
                     await self.login()
+        elif self._token_needs_renewal():
+            self._start_renewal()
         return {
             "Authorization": f"Bearer {self._token}",
             "User-Agent": USER_AGENT,
         }
 
-    async def _parse_response(self, response: aiohttp.ClientResponse, url: str) -> Any:
-        """Parse and validate a JSON response from the API."""
+    async def _read_response(self, response: aiohttp.ClientResponse) -> bytes:
+        """Validate the HTTP status and return the raw response body."""
         response.raise_for_status()
-        text = await response.text()
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError as err:
-            _LOGGER.error("Invalid JSON from %s: %.200s", url, text)
-            raise KlereoApiError(f"Invalid JSON response from {url}") from err
+        return await response.read()
 
-    async def _request_with_retry(self, method: str, url: str, **kwargs: Any) -> Any:
-        """Make an API request, retrying on 401 and transient errors."""
+    async def _send(self, method: str, url: str, **kwargs: Any) -> bytes:
+        """Send a single authenticated request and return the raw body."""
         headers = await self._get_auth_header()
+        await get_rate_limiter(url).acquire(priority=url in WRITE_URLS)
+        async with asyncio.timeout(TIMEOUT):
+            response = await self._session.request(
+                method, url, headers=headers, **kwargs
+            )
+            return await self._read_response(response)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Return the full-jitter exponential backoff delay for a retry."""
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2**attempt))
+
+    async def _request_raw_with_retry(self, method: str, url: str, **kwargs: Any) -> bytes:
+        """Make an API request, retrying on 401 and transient errors.
+
+        Transient errors are retried with exponential backoff and jitter.
+        Each endpoint has its own circuit breaker, per pool for pool-scoped
+        calls: once it is open, calls fail fast with KlereoCircuitOpenError
+        until a half-open probe succeeds.
+        """
+        breaker_key = _breaker_key(url, kwargs.get("data"))
+        breaker = self.circuit_breakers.setdefault(
+            breaker_key, CircuitBreaker(self._circuit_threshold, self._circuit_reset_timeout)
+        )
+        is_probe = breaker.before_call(breaker_key)
+        attempt = 0
         try:
-            async with asyncio.timeout(TIMEOUT):
-                response = await self._session.request(
-                    method, url, headers=headers, **kwargs
-                )
-                return await self._parse_response(response, url)
-        except aiohttp.ClientResponseError as err:
-            if err.status == 401:
-                _LOGGER.debug("Token expired, re-authenticating")
-                self._token = None
-                headers = await self._get_auth_header()
-                async with asyncio.timeout(TIMEOUT):
-                    response = await self._session.request(
-                        method, url, headers=headers, **kwargs
+            while True:
+                try:
+                    try:
+                        result = await self._send(method, url, **kwargs)
+                    except aiohttp.ClientResponseError as err:
+                        if err.status != 401:
+                            raise
+                        _LOGGER.debug("Token expired, re-authenticating")
+                        self._token = None
+                        self._token_expires_at = None
+                        result = await self._send(method, url, **kwargs)
+                except (aiohttp.ClientConnectionError, TimeoutError) as err:
+                    if attempt >= self._retry_attempts:
+                        breaker.record_failure()
+                        raise
+                    delay = self._backoff_delay(attempt)
+                    attempt += 1
+                    _LOGGER.debug(
+                        "Transient error on %s, retry %s/%s in %.1fs: %s",
+                        url, attempt, self._retry_attempts, delay, err,
                     )
-                    return await self._parse_response(response, url)
-            raise
-        except (aiohttp.ClientConnectionError, TimeoutError) as err:
-            _LOGGER.debug("Transient error on %s, retrying once: %s", url, err)
-            await asyncio.sleep(2)
-            headers = await self._get_auth_header()
-            async with asyncio.timeout(TIMEOUT):
-                response = await self._session.request(
-                    method, url, headers=headers, **kwargs
-                )
-                return await self._parse_response(response, url)
+                    await asyncio.sleep(delay)
+                    continue
+                except aiohttp.ClientResponseError as err:
+                    if err.status >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    raise
+                breaker.record_success()
+                return result
+        finally:
+            if is_probe:
+                breaker.release_probe()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Make an API request and return the parsed JSON."""
+        return decode_body(await self._request_raw(method, url, **kwargs), url)
+
+    async def _request_raw(self, method: str, url: str, **kwargs: Any) -> bytes:
+        """Make an API request, sharing identical in-flight reads.
+
+        Callers that ask for the same read (method, URL and form data) while
+        one is already in flight await that request instead of opening a new
+        one. They share the raw body; each caller decodes its own copy.
+        Write endpoints always get their own request.
+        """
+        if url in WRITE_URLS:
+            return await self._request_raw_with_retry(method, url, **kwargs)
+
+        key = (method, url, tuple(sorted((kwargs.get("data") or {}).items())))
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._request_raw_with_retry(method, url, **kwargs))
+            self._inflight[key] = future
+
+            def _done(fut: asyncio.Future) -> None:
+                if self._inflight.get(key) is fut:
+                    del self._inflight[key]
+                if not fut.cancelled():
+                    fut.exception()  # mark retrieved if every waiter went away
+
+            future.add_done_callback(_done)
+        else:
+            _LOGGER.debug("Joining in-flight request to %s", url)
+        # Shield so one cancelled caller does not cancel the shared request.
+        return await asyncio.shield(future)
+
+    def circuit_breaker_states(self) -> dict[str, dict[str, Any]]:
+        """Return the state of every endpoint (and per-pool) circuit breaker."""
+        return {url: breaker.as_dict() for url, breaker in self.circuit_breakers.items()}
 
     async def get_systems(self) -> Any:
         """Get list of pool systems."""
-        return await self._request_with_retry("GET", API_URL_GET_INDEX)
+        return await self._request("GET", API_URL_GET_INDEX)
 
-    async def get_pool_details(self, system_id: str) -> Any:
-        """Get details for a specific pool system."""
-        return await self._request_with_retry(
+    async def get_pool_details_raw(self, system_id: str) -> bytes:
+        """Get the undecoded GetPoolDetails body for a pool system.
+
+        Lets callers hash the payload and skip decoding when it is unchanged;
+        decode it with ``decode_body``.
+        """
+        return await self._request_raw(
             "POST", API_URL_GET_POOL_DETAILS, data={"poolID": system_id}
         )
 
@@ -164,7 +591,7 @@ class KlereoApi:
             mode: Output mode (OUT_MODE_MAN=0, OUT_MODE_TIME_SLOTS=1, etc.).
             state: Output state (OUT_STATE_OFF=0, OUT_STATE_ON=1).
         """
-        return await self._request_with_retry(
+        return await self._request(
             "POST",
             API_URL_SET_OUT,
             data={
@@ -184,7 +611,7 @@ class KlereoApi:
             param_id: Parameter identifier (e.g. "ConsigneEau").
             value: New value to set.
         """
-        return await self._request_with_retry(
+        return await self._request(
             "POST",
             API_URL_SET_PARAM,
             data={
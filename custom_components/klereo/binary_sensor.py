@@ -1,5 +1,6 @@
 """Binary sensor platform for Klereo."""
 import logging
+from functools import partial
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -8,19 +9,19 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import BINARY_SENSOR_TYPES
 from .entity import KlereoEntity, setup_discovery
-from .models import KlereoPoolDetails, KlereoProbe
+from .models import KIND_PROBE, KlereoPoolDetails, KlereoProbe
 
 _LOGGER = logging.getLogger(__name__)
 
 
 def _extract_binary_sensors(coordinator, system_id, details: KlereoPoolDetails):
-    """Extract binary sensors from system details."""
+    """Describe binary sensors found in system details."""
     items = []
     for probe in details.probes:
         if probe.type not in BINARY_SENSOR_TYPES:
             continue
         uid = f"{system_id}_binary_sensor_{probe.index}"
-        items.append((uid, KlereoBinarySensor(coordinator, system_id, probe)))
+        items.append((uid, partial(KlereoBinarySensor, coordinator, system_id, probe)))
     return items
 
 
@@ -36,9 +37,11 @@ async def async_setup_entry(
 class KlereoBinarySensor(KlereoEntity, BinarySensorEntity):
     """Representation of a Klereo binary probe sensor."""
 
+    _state_attr = "_attr_is_on"
+
     def __init__(self, coordinator, system_id, probe: KlereoProbe):
         """Initialize the binary sensor."""
-        super().__init__(coordinator, system_id)
+        super().__init__(coordinator, system_id, KIND_PROBE, probe.index)
         self._index = probe.index
         self._type = probe.type
 
@@ -10,7 +10,36 @@ from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import KlereoApi, KlereoApiError
-from .const import DOMAIN, SCAN_INTERVAL_MINUTES, hash_password
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_ALIGN_POLLS,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_DEADBAND,
+    CONF_KEEP_RAW_PAYLOADS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_NUMBER_DEBOUNCE,
+    CONF_POLL_MODE,
+    CONF_PRECISION,
+    CONF_SENSOR_HEARTBEAT,
+    CONF_SYSTEM_LIST_TTL,
+    CONF_VERIFY_DELAY,
+    CONFIRM_TIMEOUT_SECONDS,
+    DOMAIN,
+    MAX_SCAN_INTERVAL_MINUTES,
+    MAX_STALENESS_MINUTES,
+    MIN_SCAN_INTERVAL_MINUTES,
+    NUMBER_DEBOUNCE_SECONDS,
+    POLL_MODE_FULL,
+    POLL_MODES,
+    SCAN_INTERVAL_MINUTES,
+    SENSOR_HEARTBEAT_MINUTES,
+    SENSOR_TYPES,
+    SYSTEM_LIST_TTL_MINUTES,
+    VERIFY_DELAY_SECONDS,
+    hash_password,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -129,10 +158,15 @@ class InvalidAuth(HomeAssistantError):
 class OptionsFlowHandler(config_entries.OptionsFlow):
     """Handle Klereo options."""
 
+    def __init__(self) -> None:
+        """Initialize the options flow."""
+        self._options: dict = {}
+
     async def async_step_init(self, user_input=None):
-        """Manage the options."""
+        """Manage the polling and command options."""
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            self._options.update(user_input)
+            return await self.async_step_sensors()
 
         return self.async_show_form(
             step_id="init",
@@ -144,6 +178,88 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             "scan_interval", SCAN_INTERVAL_MINUTES
                         ),
                     ): vol.All(int, vol.Range(min=1, max=60)),
+                    vol.Optional(
+                        CONF_POLL_MODE,
+                        default=self.config_entry.options.get(CONF_POLL_MODE, POLL_MODE_FULL),
+                    ): vol.In(POLL_MODES),
+                    vol.Optional(
+                        CONF_MAX_STALENESS,
+                        default=self.config_entry.options.get(
+                            CONF_MAX_STALENESS, MAX_STALENESS_MINUTES
+                        ),
+                    ): vol.All(int, vol.Range(min=5, max=240)),
+                    vol.Optional(
+                        CONF_SYSTEM_LIST_TTL,
+                        default=self.config_entry.options.get(
+                            CONF_SYSTEM_LIST_TTL, SYSTEM_LIST_TTL_MINUTES
+                        ),
+                    ): vol.All(int, vol.Range(min=5, max=1440)),
+                    vol.Optional(
+                        CONF_ADAPTIVE_POLLING,
+                        default=self.config_entry.options.get(CONF_ADAPTIVE_POLLING, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MIN_SCAN_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_MIN_SCAN_INTERVAL, MIN_SCAN_INTERVAL_MINUTES
+                        ),
+                    ): vol.All(int, vol.Range(min=1, max=60)),
+                    vol.Optional(
+                        CONF_MAX_SCAN_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_MAX_SCAN_INTERVAL, MAX_SCAN_INTERVAL_MINUTES
+                        ),
+                    ): vol.All(int, vol.Range(min=1, max=240)),
+                    vol.Optional(
+                        CONF_ALIGN_POLLS,
+                        default=self.config_entry.options.get(CONF_ALIGN_POLLS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_VERIFY_DELAY,
+                        default=self.config_entry.options.get(
+                            CONF_VERIFY_DELAY, VERIFY_DELAY_SECONDS
+                        ),
+                    ): vol.All(int, vol.Range(min=0, max=600)),
+                    vol.Optional(
+                        CONF_CONFIRM_TIMEOUT,
+                        default=self.config_entry.options.get(
+                            CONF_CONFIRM_TIMEOUT, CONFIRM_TIMEOUT_SECONDS
+                        ),
+                    ): vol.All(int, vol.Range(min=10, max=3600)),
+                    vol.Optional(
+                        CONF_NUMBER_DEBOUNCE,
+                        default=self.config_entry.options.get(
+                            CONF_NUMBER_DEBOUNCE, NUMBER_DEBOUNCE_SECONDS
+                        ),
+                    ): vol.All(int, vol.Range(min=0, max=30)),
+                    vol.Optional(
+                        CONF_KEEP_RAW_PAYLOADS,
+                        default=self.config_entry.options.get(CONF_KEEP_RAW_PAYLOADS, False),
+                    ): bool,
                 }
             ),
         )
+
+    async def async_step_sensors(self, user_input=None):
+        """Manage the probe sensor deadbands, rounding and heartbeat."""
+        if user_input is not None:
+            self._options.update(user_input)
+            return self.async_create_entry(title="", data=self._options)
+
+        options = self.config_entry.options
+        schema = {
+            vol.Optional(
+                CONF_SENSOR_HEARTBEAT,
+                default=options.get(CONF_SENSOR_HEARTBEAT, SENSOR_HEARTBEAT_MINUTES),
+            ): vol.All(int, vol.Range(min=5, max=1440)),
+        }
+        for probe_type, sensor_def in SENSOR_TYPES.items():
+            deadband = CONF_DEADBAND.format(probe_type)
+            precision = CONF_PRECISION.format(probe_type)
+            schema[
+                vol.Optional(deadband, default=options.get(deadband, sensor_def["deadband"]))
+            ] = vol.All(vol.Coerce(float), vol.Range(min=0))
+            schema[
+                vol.Optional(precision, default=options.get(precision, sensor_def["precision"]))
+            ] = vol.All(int, vol.Range(min=0, max=3))
+        return self.async_show_form(step_id="sensors", data_schema=vol.Schema(schema))
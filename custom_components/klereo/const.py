@@ -11,6 +11,95 @@ def hash_password(plaintext: str) -> str:
 # Default update interval
 SCAN_INTERVAL_MINUTES = 5
 
+# Polling modes: "full" fetches GetPoolDetails for every pool each cycle;
+# "changes" fetches it only when the pool's GetIndex freshness fields moved
+# or after MAX_STALENESS_MINUTES.
+CONF_POLL_MODE = "poll_mode"
+CONF_MAX_STALENESS = "max_staleness"
+POLL_MODE_FULL = "full"
+POLL_MODE_CHANGES = "changes"
+POLL_MODES = [POLL_MODE_FULL, POLL_MODE_CHANGES]
+MAX_STALENESS_MINUTES = 30
+
+# The system list (GetIndex) is cached for this long in full poll mode and
+# refreshed in the background once stale. Changes mode polls it every cycle.
+CONF_SYSTEM_LIST_TTL = "system_list_ttl"
+SYSTEM_LIST_TTL_MINUTES = 60
+
+SERVICE_REFRESH_SYSTEMS = "refresh_systems"
+SERVICE_APPLY = "apply"
+ATTR_OUTPUTS = "outputs"
+ATTR_PARAMS = "params"
+ATTR_SYSTEM_ID = "system_id"
+
+# GetIndex per-system fields that move when the controller uploads new data.
+# Systems reporting none of them are always fetched in full.
+INDEX_FRESHNESS_KEYS = ("lastUpdate", "lastContact", "lastDataUpdate")
+
+# Adaptive polling (full poll mode): each pool's interval moves between
+# the min and max bounds based on what its last polls showed.
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+MIN_SCAN_INTERVAL_MINUTES = 1
+MAX_SCAN_INTERVAL_MINUTES = 30
+# Consecutive unchanged polls before the interval starts growing
+ADAPTIVE_IDLE_CYCLES = 3
+# Outputs whose "on" state means regulation is running (Filtration, Heating)
+ADAPTIVE_ACTIVE_OUTPUTS = (1, 4)
+# GetPoolDetails "PoolMode" value for winter mode (hivernage)
+POOL_MODE_WINTER = 4
+
+# Upload cadence learning: each pool's upload period and phase are fitted
+# from the polls where its GetPoolDetails content changed. With
+# CONF_ALIGN_POLLS, polls are scheduled CADENCE_FETCH_MARGIN seconds after
+# the expected upload.
+CONF_ALIGN_POLLS = "align_polls"
+CADENCE_SAMPLES = 8
+CADENCE_MIN_SAMPLES = 4
+CADENCE_MIN_PERIOD = 60
+CADENCE_FETCH_MARGIN = 30
+# Aligned polls in a row that found no new data before alignment pauses
+CADENCE_MAX_MISSES = 3
+
+# After a command the expected state is published immediately and held
+# while the pool is re-fetched (first after VERIFY_DELAY_SECONDS, then with
+# doubling delays) until the cloud reports it or CONFIRM_TIMEOUT_SECONDS pass.
+CONF_VERIFY_DELAY = "verify_delay"
+CONF_CONFIRM_TIMEOUT = "confirm_timeout"
+VERIFY_DELAY_SECONDS = 30
+CONFIRM_TIMEOUT_SECONDS = 300
+CONFIRM_RETRY_MIN_SECONDS = 5
+COMMAND_PENDING = "pending"
+COMMAND_CONFIRMED = "confirmed"
+COMMAND_TIMED_OUT = "timed_out"
+
+# Number entities send only the last value set within this window (seconds)
+CONF_NUMBER_DEBOUNCE = "number_debounce"
+NUMBER_DEBOUNCE_SECONDS = 2
+
+# Probe sensors round readings to a per-type number of decimals and only
+# publish a new value once it moved by the type's deadband from the last
+# published one, or after CONF_SENSOR_HEARTBEAT minutes. Per-type options
+# are stored as CONF_DEADBAND.format(probe_type) / CONF_PRECISION.format(...),
+# defaulting to the SENSOR_TYPES values.
+CONF_DEADBAND = "deadband_{}"
+CONF_PRECISION = "precision_{}"
+CONF_SENSOR_HEARTBEAT = "sensor_heartbeat"
+SENSOR_HEARTBEAT_MINUTES = 60
+
+# Keep each pool's last raw GetIndex entry and GetPoolDetails response for
+# diagnostics (off: only the parsed fields are kept)
+CONF_KEEP_RAW_PAYLOADS = "keep_raw_payloads"
+
+# Upper bound for the stretched interval while the API circuit is open
+MAX_BACKOFF_INTERVAL_MINUTES = 60
+
+# Persisted session token (one store per config entry)
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{entry_id}}"
+TOKEN_SAVE_DELAY = 1
+
 # Probe types that return binary 0/1 values and should be BinarySensorEntity
 BINARY_SENSOR_TYPES = {
     10: {"name": "Generic", "device_class": None},
@@ -18,22 +107,54 @@ BINARY_SENSOR_TYPES = {
 
 # Probe type to sensor metadata mapping (from Jeedom _PROBE_TYPE_* constants)
 # state_class: "measurement" for continuous readings, None for positional/unknown values
+# deadband/precision: default sensor filter (see CONF_DEADBAND/CONF_PRECISION)
 SENSOR_TYPES = {
     0: {
         "name": "Technical Room Temperature", "unit": "°C",
         "device_class": "temperature", "state_class": "measurement",
+        "deadband": 0.2, "precision": 1,
+    },
+    1: {
+        "name": "Air Temperature", "unit": "°C", "device_class": "temperature",
+        "state_class": "measurement", "deadband": 0.2, "precision": 1,
+    },
+    2: {
+        "name": "Water Level", "unit": "%", "device_class": None,
+        "state_class": "measurement", "deadband": 1, "precision": 0,
+    },
+    3: {
+        "name": "pH", "unit": None, "device_class": None,
+        "state_class": "measurement", "deadband": 0.05, "precision": 2,
+    },
+    4: {
+        "name": "Redox", "unit": "mV", "device_class": "voltage",
+        "state_class": "measurement", "deadband": 5, "precision": 0,
+    },
+    5: {
+        "name": "Water Temperature", "unit": "°C", "device_class": "temperature",
+        "state_class": "measurement", "deadband": 0.1, "precision": 1,
+    },
+    6: {
+        "name": "Filter Pressure", "unit": "mbar", "device_class": "pressure",
+        "state_class": "measurement", "deadband": 10, "precision": 0,
     },
-    1: {"name": "Air Temperature", "unit": "°C", "device_class": "temperature", "state_class": "measurement"},
-    2: {"name": "Water Level", "unit": "%", "device_class": None, "state_class": "measurement"},
-    3: {"name": "pH", "unit": None, "device_class": None, "state_class": "measurement"},
-    4: {"name": "Redox", "unit": "mV", "device_class": "voltage", "state_class": "measurement"},
-    5: {"name": "Water Temperature", "unit": "°C", "device_class": "temperature", "state_class": "measurement"},
-    6: {"name": "Filter Pressure", "unit": "mbar", "device_class": "pressure", "state_class": "measurement"},
     # type 10 "Generic" lives in BINARY_SENSOR_TYPES
-    11: {"name": "Flow", "unit": "m³/h", "device_class": None, "state_class": "measurement"},
-    12: {"name": "Container Level", "unit": "%", "device_class": None, "state_class": "measurement"},
-    13: {"name": "Cover Position", "unit": "%", "device_class": None, "state_class": None},
-    14: {"name": "Chlorine", "unit": "mg/L", "device_class": None, "state_class": "measurement"},
+    11: {
+        "name": "Flow", "unit": "m³/h", "device_class": None,
+        "state_class": "measurement", "deadband": 0.1, "precision": 1,
+    },
+    12: {
+        "name": "Container Level", "unit": "%", "device_class": None,
+        "state_class": "measurement", "deadband": 1, "precision": 0,
+    },
+    13: {
+        "name": "Cover Position", "unit": "%", "device_class": None,
+        "state_class": None, "deadband": 1, "precision": 0,
+    },
+    14: {
+        "name": "Chlorine", "unit": "mg/L", "device_class": None,
+        "state_class": "measurement", "deadband": 0.05, "precision": 2,
+    },
 }
 
 OUTPUT_NAMES = {
@@ -1,89 +1,162 @@
-"""DataUpdateCoordinator for Klereo."""
+"""DataUpdateCoordinators for Klereo.
+
+``KlereoCoordinator`` is the account-level coordinator: it reads the system
+list (GetIndex), owns one ``KlereoSystemCoordinator`` per pool and exposes
+the combined data for discovery, diagnostics and commands. Each system
+coordinator polls GetPoolDetails for its own pool on its own schedule, so a
+slow or failing pool never delays the others.
+"""
+from __future__ import annotations
+
 import asyncio
+import dataclasses
+import hashlib
 import logging
+import time
+from collections import ChainMap
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from datetime import timedelta
-from typing import Any
+from functools import partial
+from typing import Any, TypeVar
 
 import aiohttp
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import KlereoApi, KlereoApiError
-from .const import SCAN_INTERVAL_MINUTES
-from .models import KlereoPoolDetails, KlereoSystemData, KlereoSystemInfo
+from .api import (
+    API_URL_GET_POOL_DETAILS,
+    KlereoApi,
+    KlereoApiError,
+    KlereoCircuitOpenError,
+    decode_body,
+)
+from .const import (
+    COMMAND_CONFIRMED,
+    COMMAND_PENDING,
+    COMMAND_TIMED_OUT,
+    CONFIRM_RETRY_MIN_SECONDS,
+    CONFIRM_TIMEOUT_SECONDS,
+    DOMAIN,
+    INDEX_FRESHNESS_KEYS,
+    MAX_BACKOFF_INTERVAL_MINUTES,
+    MAX_SCAN_INTERVAL_MINUTES,
+    MAX_STALENESS_MINUTES,
+    MIN_SCAN_INTERVAL_MINUTES,
+    NUMBER_DEBOUNCE_SECONDS,
+    POLL_MODE_CHANGES,
+    POLL_MODE_FULL,
+    SCAN_INTERVAL_MINUTES,
+    SENSOR_HEARTBEAT_MINUTES,
+    SENSOR_TYPES,
+    SYSTEM_LIST_TTL_MINUTES,
+    VERIFY_DELAY_SECONDS,
+)
+from .models import (
+    COMMAND_OUTPUT,
+    COMMAND_PARAM,
+    KIND_OUTPUT,
+    KIND_PARAM,
+    KIND_PROBE,
+    KlereoCommand,
+    KlereoPoolDetails,
+    KlereoSystemData,
+    KlereoSystemInfo,
+    KlereoTopology,
+    KlereoTopologyDiff,
+)
+from .scheduler import AdaptivePollScheduler, UploadCadenceTracker
 
 _LOGGER = logging.getLogger(__name__)
 
+_DataT = TypeVar("_DataT")
 
-class KlereoCoordinator(DataUpdateCoordinator[dict[str, KlereoSystemData]]):
-    """Klereo data update coordinator."""
+_MISSING = object()
 
-    api: KlereoApi
 
-    def __init__(self, hass: HomeAssistant, api: KlereoApi, scan_interval: int = SCAN_INTERVAL_MINUTES) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name="klereo",
-            update_interval=timedelta(minutes=scan_interval),
-        )
-        self.api = api
+def _changed_slices(
+    previous: KlereoSystemData | None, current: KlereoSystemData | None
+) -> set[tuple[str, Any]]:
+    """Return the (kind, index) slices that differ between two pool datas."""
+    if previous is current:
+        return set()
+    old = previous.details if previous is not None else KlereoPoolDetails()
+    new = current.details if current is not None else KlereoPoolDetails()
+    changed: set[tuple[str, Any]] = set()
+    for kind, old_map, new_map in (
+        (KIND_PROBE, old.probe_index, new.probe_index),
+        (KIND_OUTPUT, old.output_index, new.output_index),
+        (KIND_PARAM, old.regul_modes, new.regul_modes),
+    ):
+        if old_map is new_map:
+            continue
+        for index in old_map.keys() | new_map.keys():
+            if old_map.get(index, _MISSING) != new_map.get(index, _MISSING):
+                changed.add((kind, index))
+    return changed
 
-    async def _async_update_data(self) -> dict[str, KlereoSystemData]:
-        """Fetch data from the Klereo API."""
-        try:
-            systems_response = await self.api.get_systems()
-            _LOGGER.debug("Systems response: %s", systems_response)
-
-            if isinstance(systems_response, dict):
-                system_list = systems_response.get(
-                    "response", systems_response.get("list_systems", [])
-                )
-            elif isinstance(systems_response, list):
-                system_list = systems_response
-            else:
-                system_list = []
-
-            if not isinstance(system_list, list):
-                system_list = []
-
-            # Build system map
-            data: dict[str, KlereoSystemData] = {}
-            system_map: dict[str, dict] = {}
-            for system in system_list:
-                sys_id = system.get("idSystem")
-                if sys_id:
-                    system_map[sys_id] = system
-
-            # Fetch all pool details in parallel
-            details_results = await asyncio.gather(
-                *(self.api.get_pool_details(sid) for sid in system_map),
-                return_exceptions=True,
-            )
 
-            for sys_id, result in zip(system_map, details_results):
-                system = system_map[sys_id]
-                details_raw = system.copy()
+def _confirm_delays(first: float, timeout: float) -> Iterator[float]:
+    """Yield the waits between confirmation fetches, summing to ``timeout``."""
+    delay, elapsed = first, 0.0
+    while elapsed < timeout:
+        wait = min(delay, timeout - elapsed)
+        yield wait
+        elapsed += wait
+        delay = max(delay * 2, CONFIRM_RETRY_MIN_SECONDS)
+
+
+def _index_digest(system: dict[str, Any]) -> bytes:
+    """Hash a GetIndex entry, so it can be compared without keeping it."""
+    return hashlib.blake2b(repr(system).encode(), digest_size=16).digest()
+
+
+# GetIndex fields the integration reads: pool identity and name, freshness
+# markers, and the details fields GetPoolDetails may omit
+_INDEX_KEYS = (
+    "idSystem", "poolNickname", *INDEX_FRESHNESS_KEYS, "probes", "outs", "RegulModes", "PoolMode",
+)
+
 
-                if isinstance(result, Exception):
-                    _LOGGER.warning(
-                        "Failed to get pool details for system %s: %s",
-                        sys_id, result,
-                    )
-                elif isinstance(result, dict):
-                    response_data = result.get("response")
-                    if isinstance(response_data, list) and response_data:
-                        details_raw.update(response_data[0])
+def _trim_index_entry(system: dict[str, Any]) -> dict[str, Any]:
+    """Return a GetIndex entry reduced to the fields the integration reads."""
+    return {key: system[key] for key in _INDEX_KEYS if key in system}
 
-                data[sys_id] = KlereoSystemData(
-                    info=KlereoSystemInfo.from_dict(system),
-                    details=KlereoPoolDetails.from_dict(details_raw),
-                )
 
-            return data
+def _freshness_marker(system: dict[str, Any]) -> tuple | None:
+    """Return the GetIndex fields that change when a pool uploads new data."""
+    marker = tuple(system[key] for key in INDEX_FRESHNESS_KEYS if key in system)
+    return marker or None
 
+
+class _KlereoBaseCoordinator(DataUpdateCoordinator[_DataT]):
+    """Shared error handling for the Klereo coordinators."""
+
+    def __init__(self, hass: HomeAssistant, name: str, update_interval: timedelta) -> None:
+        """Initialize the coordinator."""
+        super().__init__(hass, _LOGGER, name=name, update_interval=update_interval)
+        self._base_interval = update_interval
+
+    @contextmanager
+    def _api_errors(self) -> Iterator[None]:
+        """Translate API errors into coordinator errors.
+
+        While an endpoint's circuit is open the update interval is doubled
+        (up to MAX_BACKOFF_INTERVAL_MINUTES); a successful call restores it.
+        """
+        try:
+            yield
+        except KlereoCircuitOpenError as err:
+            # The cloud is degraded: poll less often until a probe succeeds.
+            self.update_interval = min(
+                max(self.update_interval * 2, timedelta(seconds=err.retry_after)),
+                timedelta(minutes=MAX_BACKOFF_INTERVAL_MINUTES),
+            )
+            raise UpdateFailed(
+                f"Klereo API unavailable, next attempt in {self.update_interval}: {err}"
+            ) from err
         except KlereoApiError as err:
             raise UpdateFailed(
                 f"Klereo API error: {err}"
@@ -96,27 +169,634 @@ class KlereoCoordinator(DataUpdateCoordinator[dict[str, KlereoSystemData]]):
             raise UpdateFailed(
                 f"Error communicating with Klereo API: {err}"
             ) from err
+        else:
+            self.update_interval = self._base_interval
+
+
+class KlereoSystemCoordinator(_KlereoBaseCoordinator[KlereoSystemData]):
+    """Polls GetPoolDetails for a single pool system."""
+
+    def __init__(self, hass: HomeAssistant, parent: KlereoCoordinator, system_id: str) -> None:
+        """Initialize the coordinator."""
+        super().__init__(hass, f"klereo_{system_id}", parent.system_update_interval)
+        self.api = parent.api
+        self.system_id = system_id
+        self._parent = parent
+        # Hash of the last GetPoolDetails body parsed, and of the GetIndex
+        # entry it was combined with
+        self._digest: bytes | None = None
+        self._index_digest: bytes | None = None
+        # Last raw GetPoolDetails response, only kept with the parent's
+        # keep_raw_payloads (diagnostics)
+        self.raw_details: Any = None
+        # GetIndex freshness marker at the time of the last details fetch
+        self.freshness: tuple | None = None
+        self.scheduler: AdaptivePollScheduler | None = parent.create_scheduler()
+        self.cadence = UploadCadenceTracker()
+        # Set while confirmation fetches run; they do not feed the cadence.
+        self._confirming = False
+        # Commands awaiting confirmation, and the outcome of each, by label
+        self._expected: dict[str, KlereoCommand] = {}
+        self.command_status: dict[str, str] = {}
+        self._confirm_task: asyncio.Task | None = None
+        # Commands waiting to be sent, by label, with the callers' futures
+        self._queue: dict[str, tuple[KlereoCommand, list[asyncio.Future[Any]]]] = {}
+        self._sender: asyncio.Task | None = None
+
+    async def _async_update_data(self) -> KlereoSystemData:
+        """Fetch this pool's details from the Klereo API."""
+        system = self._parent.system_map.get(self.system_id)
+        if system is None:
+            raise UpdateFailed(f"System {self.system_id} is no longer listed")
+
+        with self._api_errors():
+            body = await self.api.get_pool_details_raw(self.system_id)
+            self.freshness = _freshness_marker(system)
+
+            # Unchanged payload: reuse the previous object so entities can
+            # tell by identity that nothing changed.
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            index_digest = _index_digest(system)
+            unchanged = (
+                self.data is not None
+                and digest == self._digest
+                and index_digest == self._index_digest
+            )
+            if not unchanged:
+                result = decode_body(body, API_URL_GET_POOL_DETAILS)
+
+        now = time.monotonic()
+        if not self._confirming:
+            self.cadence.observe(self._digest is not None and digest != self._digest, now)
+        if unchanged:
+            data = self.data
+        else:
+            response: dict[str, Any] = {}
+            if isinstance(result, dict):
+                response_data = result.get("response")
+                if isinstance(response_data, list) and response_data:
+                    response = response_data[0]
+            if self._parent.keep_raw_payloads:
+                self.raw_details = result
+            self._digest = digest
+            self._index_digest = index_digest
+            data = KlereoSystemData(
+                info=KlereoSystemInfo.from_dict(system),
+                # Details fields missing from GetPoolDetails fall back to GetIndex.
+                details=self._reconcile(KlereoPoolDetails.from_dict(ChainMap(response, system))),
+            )
+
+        if self.scheduler is not None:
+            self.update_interval = self.scheduler.next_interval(self.data, data)
+        if self._parent.align_polls:
+            delay = self.cadence.next_delay(self.update_interval.total_seconds(), now)
+            if delay is not None:
+                self.update_interval = timedelta(seconds=delay)
+        return data
+
+    @callback
+    def async_update_info(self, system: dict[str, Any]) -> None:
+        """Publish changed GetIndex metadata without refetching details."""
+        if self.data is None:
+            return
+        index_digest = _index_digest(system)
+        if index_digest != self._index_digest:
+            self._index_digest = index_digest
+            self.async_set_updated_data(
+                dataclasses.replace(self.data, info=KlereoSystemInfo.from_dict(system))
+            )
+
+    async def async_send(self, command: KlereoCommand) -> Any:
+        """Queue a command for this pool and return the API response.
+
+        Commands are sent one at a time, in order. A command queued for an
+        output or parameter that already has one waiting replaces it (last
+        write wins); both callers get the response of the command actually
+        sent. Once the queue drains, a single confirmation run re-fetches
+        the pool.
+        """
+        future: asyncio.Future[Any] = self.hass.loop.create_future()
+        queued = self._queue.pop(command.label, None)
+        futures = [*queued[1], future] if queued is not None else [future]
+        self._queue[command.label] = (command, futures)
+        if self._sender is None:
+            self._sender = self.hass.async_create_background_task(
+                self._async_drain(), f"klereo_{self.system_id}_commands"
+            )
+        return await future
+
+    async def _async_drain(self) -> None:
+        """Send queued commands serially, then confirm the ones that succeeded."""
+        sent = False
+        try:
+            while self._queue:
+                label = next(iter(self._queue))
+                command, futures = self._queue.pop(label)
+                try:
+                    result = await self._async_send_now(command)
+                except asyncio.CancelledError:
+                    # Shutdown: release the callers of the in-flight command.
+                    for future in futures:
+                        future.cancel()
+                    raise
+                except Exception as err:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(err)
+                    continue
+                self._async_hold(command)
+                sent = True
+                for future in futures:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._sender = None
+        if sent:
+            self._async_start_confirmation()
+
+    async def _async_send_now(self, command: KlereoCommand) -> Any:
+        """Send one command to the API."""
+        if command.kind == COMMAND_OUTPUT:
+            mode, state = command.value
+            return await self.api.set_output(self.system_id, command.key, mode, state)
+        return await self.api.set_param(self.system_id, command.key, command.value)
+
+    @callback
+    def _async_hold(self, command: KlereoCommand) -> None:
+        """Publish the state a sent command asks for and hold it until confirmed.
+
+        The expected state is overlaid on every fetch until the cloud
+        reports it or the confirmation run gives up.
+        """
+        self._expected[command.label] = command
+        self.command_status[command.label] = COMMAND_PENDING
+        # The command changes the content; that is not an upload to learn from.
+        self.cadence.interrupt()
+        if self.data is not None:
+            # The cloud may still serve the pre-command body; make sure the
+            # next fetch is decoded and reconciled instead of matching the
+            # old hash.
+            self._digest = None
+            self.async_set_updated_data(
+                dataclasses.replace(self.data, details=self.data.details.with_command(command))
+            )
+
+    @callback
+    def _async_start_confirmation(self) -> None:
+        """(Re)start the confirmation run with a fresh deadline.
+
+        The pool is re-fetched after the parent's ``verify_delay``, then with
+        doubling delays, until all pending commands are confirmed or
+        ``confirm_timeout`` passes.
+        """
+        if self._confirm_task is not None:
+            self._confirm_task.cancel()
+        self._confirm_task = self.hass.async_create_background_task(
+            self._async_confirm(), f"klereo_{self.system_id}_confirm"
+        )
+
+    def _reconcile(self, details: KlereoPoolDetails) -> KlereoPoolDetails:
+        """Confirm pending commands the fetch reflects; overlay the rest."""
+        for label, command in list(self._expected.items()):
+            if details.satisfies(command):
+                del self._expected[label]
+                self.command_status[label] = COMMAND_CONFIRMED
+            else:
+                details = details.with_command(command)
+        return details
+
+    async def _async_confirm(self) -> None:
+        """Re-fetch this pool until pending commands are confirmed or expire."""
+        for delay in _confirm_delays(self._parent.verify_delay, self._parent.confirm_timeout):
+            await asyncio.sleep(delay)
+            await self._async_confirm_refresh()
+            if not self._expected:
+                self._confirm_task = None
+                return
+
+        _LOGGER.warning(
+            "Klereo did not confirm %s on system %s within %s s",
+            ", ".join(self._expected), self.system_id, self._parent.confirm_timeout,
+        )
+        for label in self._expected:
+            self.command_status[label] = COMMAND_TIMED_OUT
+        self._expected.clear()
+        self._confirm_task = None
+        # Publish whatever the cloud reports now.
+        self._digest = None
+        await self._async_confirm_refresh()
+
+    async def _async_confirm_refresh(self) -> None:
+        """Refresh outside the poll schedule, without feeding the cadence."""
+        self._confirming = True
+        try:
+            await self.async_refresh()
+        finally:
+            self._confirming = False
+
+    async def async_shutdown(self) -> None:
+        """Cancel polling, queued commands and any pending confirmation."""
+        await super().async_shutdown()
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        for _command, futures in self._queue.values():
+            for future in futures:
+                future.cancel()
+        self._queue.clear()
+        if self._confirm_task is not None:
+            self._confirm_task.cancel()
+            self._confirm_task = None
+
+
+class KlereoCoordinator(_KlereoBaseCoordinator[dict[str, KlereoSystemData]]):
+    """Klereo account coordinator: pool discovery and combined data.
+
+    Its listeners without a context (platform discovery) are notified on
+    account refreshes and whenever a pool's data object changes, with
+    ``topology_changes`` holding the pools whose probes, outputs or
+    parameters changed in that update. Entity listeners use a
+    ``(system_id, kind, index)`` context and are only called when that
+    slice of their pool changed, or its availability or command status did.
+    """
+
+    api: KlereoApi
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: KlereoApi,
+        scan_interval: int = SCAN_INTERVAL_MINUTES,
+        poll_mode: str = POLL_MODE_FULL,
+        max_staleness: int = MAX_STALENESS_MINUTES,
+        system_list_ttl: int = SYSTEM_LIST_TTL_MINUTES,
+        adaptive_polling: bool = False,
+        min_scan_interval: int = MIN_SCAN_INTERVAL_MINUTES,
+        max_scan_interval: int = MAX_SCAN_INTERVAL_MINUTES,
+        align_polls: bool = False,
+        verify_delay: int = VERIFY_DELAY_SECONDS,
+        confirm_timeout: int = CONFIRM_TIMEOUT_SECONDS,
+        number_debounce: float = NUMBER_DEBOUNCE_SECONDS,
+        sensor_filters: dict[int, tuple[float, int]] | None = None,
+        sensor_heartbeat: int = SENSOR_HEARTBEAT_MINUTES,
+        keep_raw_payloads: bool = False,
+    ) -> None:
+        """Initialize the coordinator.
+
+        In full poll mode the pool list is re-read every ``system_list_ttl``
+        minutes and each pool polls its details every ``scan_interval``.
+        In changes mode GetIndex is read every ``scan_interval`` as a change
+        probe, and a pool's details are fetched when its freshness fields
+        moved, or every ``max_staleness`` minutes at the latest.
+
+        With ``adaptive_polling`` (full mode only) each pool's interval is
+        picked by an ``AdaptivePollScheduler`` between ``min_scan_interval``
+        and ``max_scan_interval``, starting from ``scan_interval``. With
+        ``align_polls`` (full mode only) each poll is then moved to just
+        after the pool's expected cloud upload.
+
+        Commands publish their expected result at once; only the affected
+        pool is re-fetched, starting ``verify_delay`` seconds later, until the
+        cloud confirms it or ``confirm_timeout`` seconds pass. Number
+        entities send only the last value set within ``number_debounce``
+        seconds.
+
+        ``sensor_filters`` maps a probe type to the ``(deadband, precision)``
+        its sensors publish with (default: from SENSOR_TYPES); a value within
+        the deadband is still published after ``sensor_heartbeat`` minutes.
+
+        Raw API payloads are only kept, for diagnostics, with
+        ``keep_raw_payloads``.
+        """
+        self._poll_mode = poll_mode
+        self._adaptive_polling = adaptive_polling and poll_mode != POLL_MODE_CHANGES
+        self._min_scan_interval = timedelta(minutes=min_scan_interval)
+        self._max_scan_interval = timedelta(minutes=max_scan_interval)
+        self.align_polls = align_polls and poll_mode != POLL_MODE_CHANGES
+        self.verify_delay = verify_delay
+        self.confirm_timeout = confirm_timeout
+        self.number_debounce = number_debounce
+        if sensor_filters is None:
+            sensor_filters = {
+                probe_type: (sensor_def["deadband"], sensor_def["precision"])
+                for probe_type, sensor_def in SENSOR_TYPES.items()
+            }
+        self.sensor_filters = sensor_filters
+        self.sensor_heartbeat = sensor_heartbeat * 60
+        self.keep_raw_payloads = keep_raw_payloads
+        if poll_mode == POLL_MODE_CHANGES:
+            account_interval = timedelta(minutes=scan_interval)
+            self.system_update_interval = timedelta(minutes=max_staleness)
+        else:
+            account_interval = timedelta(minutes=system_list_ttl)
+            self.system_update_interval = timedelta(minutes=scan_interval)
+        super().__init__(hass, "klereo", account_interval)
+        self.api = api
+        # Trimmed GetIndex entry of each pool, and with keep_raw_payloads the
+        # untrimmed one
+        self.system_map: dict[str, dict] = {}
+        self.raw_index: dict[str, dict] = {}
+        self.system_coordinators: dict[str, KlereoSystemCoordinator] = {}
+        self._system_unsubs: dict[str, CALLBACK_TYPE] = {}
+        self.topology: dict[str, KlereoTopology] = {}
+        self.topology_changes: dict[str, KlereoTopologyDiff] = {}
+        # Details object each pool's topology was last computed from
+        self._topology_details: dict[str, KlereoPoolDetails] = {}
+        # system_id -> (kind, index) -> entity callbacks
+        self._subscribers: dict[str, dict[tuple[str, Any], list[CALLBACK_TYPE]]] = {}
+        # Pool success flag and command statuses as last dispatched
+        self._dispatched: dict[str, tuple[bool, dict[str, str]]] = {}
+
+    def create_scheduler(self) -> AdaptivePollScheduler | None:
+        """Return a scheduler for a new pool, or None for a fixed interval."""
+        if not self._adaptive_polling:
+            return None
+        return AdaptivePollScheduler(
+            self.system_update_interval, self._min_scan_interval, self._max_scan_interval
+        )
+
+    async def _async_fetch_system_map(self) -> dict[str, dict]:
+        """Fetch the account's systems from GetIndex, keyed by ID.
+
+        Entries are trimmed to the fields the integration reads; the raw
+        entries are only kept in ``raw_index`` with ``keep_raw_payloads``.
+        """
+        systems_response = await self.api.get_systems()
+        _LOGGER.debug("Systems response: %s", systems_response)
+
+        if isinstance(systems_response, dict):
+            system_list = systems_response.get(
+                "response", systems_response.get("list_systems", [])
+            )
+        elif isinstance(systems_response, list):
+            system_list = systems_response
+        else:
+            system_list = []
+
+        if not isinstance(system_list, list):
+            system_list = []
+
+        system_map: dict[str, dict] = {}
+        raw_index: dict[str, dict] = {}
+        for system in system_list:
+            sys_id = system.get("idSystem")
+            if sys_id:
+                system_map[sys_id] = _trim_index_entry(system)
+                if self.keep_raw_payloads:
+                    raw_index[sys_id] = system
+        self.raw_index = raw_index
+        return system_map
+
+    async def _async_update_data(self) -> dict[str, KlereoSystemData]:
+        """Refresh the pool list and manage the per-pool coordinators."""
+        with self._api_errors():
+            self.system_map = await self._async_fetch_system_map()
+
+        for sys_id in self.system_coordinators.keys() - self.system_map.keys():
+            _LOGGER.debug("System %s is no longer listed, stopping its updates", sys_id)
+            await self._async_remove_system(sys_id)
+            self._async_remove_device(sys_id)
+
+        new_ids = [sid for sid in self.system_map if sid not in self.system_coordinators]
+        for sys_id in new_ids:
+            self._add_system(sys_id)
+
+        to_refresh = new_ids + [
+            sid for sid, system in self.system_map.items()
+            if sid not in new_ids and self._needs_details(sid, system)
+        ]
+        await asyncio.gather(
+            *(self.system_coordinators[sid].async_refresh() for sid in to_refresh)
+        )
+        for sys_id, system in self.system_map.items():
+            if sys_id not in to_refresh:
+                self.system_coordinators[sys_id].async_update_info(system)
+
+        data = self._combined_data()
+        self._track_topology(data)
+        return data
+
+    def _needs_details(self, sys_id: str, system: dict[str, Any]) -> bool:
+        """Return True if an account refresh should also refresh this pool.
+
+        Only used in changes poll mode, where GetIndex is the change probe;
+        in full mode each pool refreshes on its own schedule.
+        """
+        if self._poll_mode != POLL_MODE_CHANGES:
+            return False
+        coordinator = self.system_coordinators[sys_id]
+        marker = _freshness_marker(system)
+        return (
+            marker is None
+            or not coordinator.last_update_success
+            or marker != coordinator.freshness
+        )
+
+    def _add_system(self, sys_id: str) -> None:
+        """Create the coordinator for a newly listed pool."""
+        coordinator = KlereoSystemCoordinator(self.hass, self, sys_id)
+        coordinator.config_entry = self.config_entry
+        self.system_coordinators[sys_id] = coordinator
+        # Our listener keeps the pool coordinator scheduling its own polls.
+        self._system_unsubs[sys_id] = coordinator.async_add_listener(
+            partial(self._async_system_updated, sys_id)
+        )
+
+    async def _async_remove_system(self, sys_id: str) -> None:
+        """Stop and drop the coordinator of a pool that disappeared."""
+        self._system_unsubs.pop(sys_id)()
+        self._dispatched.pop(sys_id, None)
+        await self.system_coordinators.pop(sys_id).async_shutdown()
+
+    @callback
+    def _async_remove_device(self, sys_id: str) -> None:
+        """Detach a vanished pool's device (and so its entities) from this entry."""
+        if self.config_entry is None:
+            return
+        device_registry = dr.async_get(self.hass)
+        device = device_registry.async_get_device(identifiers={(DOMAIN, sys_id)})
+        if device is not None:
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=self.config_entry.entry_id
+            )
+
+    def _track_topology(self, data: dict[str, KlereoSystemData]) -> None:
+        """Set ``topology_changes`` to the pools whose topology moved.
+
+        Only pools with a new details object are re-examined; pools that
+        are gone report their whole previous topology as removed.
+        """
+        changes: dict[str, KlereoTopologyDiff] = {}
+        for sys_id in self.topology.keys() - data.keys():
+            del self._topology_details[sys_id]
+            changes[sys_id] = KlereoTopologyDiff(removed=self.topology.pop(sys_id))
+        for sys_id, system in data.items():
+            if self._topology_details.get(sys_id) is system.details:
+                continue
+            self._topology_details[sys_id] = system.details
+            topology = system.details.topology
+            previous = self.topology.get(sys_id, KlereoTopology())
+            if sys_id in self.topology and topology == previous:
+                continue
+            self.topology[sys_id] = topology
+            changes[sys_id] = KlereoTopologyDiff(
+                added=topology - previous, removed=previous - topology
+            )
+        if changes:
+            _LOGGER.debug("Topology changes: %s", changes)
+        self.topology_changes = changes
+
+    def _combined_data(self) -> dict[str, KlereoSystemData]:
+        """Return the latest data of every pool that has been fetched."""
+        return {
+            sid: coordinator.data
+            for sid, coordinator in self.system_coordinators.items()
+            if coordinator.data is not None
+        }
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for updates; ``(system_id, kind, index)`` contexts are keyed."""
+        if not isinstance(context, tuple):
+            return super().async_add_listener(update_callback, context)
+        sys_id, kind, index = context
+        callbacks = self._subscribers.setdefault(sys_id, {}).setdefault((kind, index), [])
+        callbacks.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            callbacks.remove(update_callback)
+            if not callbacks:
+                pool = self._subscribers[sys_id]
+                del pool[(kind, index)]
+                if not pool:
+                    del self._subscribers[sys_id]
+
+        return remove_listener
+
+    @callback
+    def _async_system_updated(self, sys_id: str) -> None:
+        """Fold a pool update into the combined data and notify its entities.
+
+        Entities are only called for the slices of the pool that changed.
+        """
+        system_coordinator = self.system_coordinators[sys_id]
+        system_data = system_coordinator.data
+        previous = self.data.get(sys_id) if self.data is not None else None
+        data_changed = self.data is not None and previous is not system_data
+        if data_changed:
+            self.data = self._combined_data()
+            self._track_topology(self.data)
+
+        success = system_coordinator.last_update_success
+        status = system_coordinator.command_status
+        last_success, last_status = self._dispatched.get(sys_id, (None, {}))
+        if pool := self._subscribers.get(sys_id):
+            if success != last_success:
+                keys = set(pool)
+            else:
+                keys = _changed_slices(previous, system_data)
+                if status != last_status:
+                    labels = {
+                        label
+                        for label in status.keys() | last_status.keys()
+                        if status.get(label) != last_status.get(label)
+                    }
+                    keys.update(key for key in pool if f"{key[0]}_{key[1]}" in labels)
+            for key in keys:
+                for update_callback in list(pool.get(key, ())):
+                    update_callback()
+        if status != last_status:
+            last_status = dict(status)
+        self._dispatched[sys_id] = (success, last_status)
+
+        if data_changed:
+            for update_callback, context in list(self._listeners.values()):
+                if context is None:
+                    update_callback()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify discovery listeners only; entities follow their own pool."""
+        for update_callback, context in list(self._listeners.values()):
+            if context is None:
+                update_callback()
+
+    async def async_refresh_systems(self) -> None:
+        """Re-read the pool list and refresh every pool now."""
+        existing = list(self.system_coordinators.values())
+        await self.async_refresh()
+        await asyncio.gather(
+            *(
+                coordinator.async_refresh()
+                for coordinator in existing
+                if coordinator in self.system_coordinators.values()
+            )
+        )
+
+    async def async_shutdown(self) -> None:
+        """Cancel the account refresh and every pool coordinator."""
+        await super().async_shutdown()
+        for sys_id in list(self.system_coordinators):
+            await self._async_remove_system(sys_id)
+
+    async def async_apply(self, commands: list[tuple[str, KlereoCommand]]) -> None:
+        """Apply a batch of ``(system_id, command)`` pairs.
+
+        Pools are handled concurrently. Each pool's commands are queued
+        together, so they are sent serially in the given order (collapsing
+        repeats) and confirmed by a single refresh of that pool. Raises
+        HomeAssistantError listing every command that failed.
+        """
+        by_system: dict[str, list[KlereoCommand]] = {}
+        for system_id, command in commands:
+            self._system_coordinator(system_id)
+            by_system.setdefault(system_id, []).append(command)
+
+        pairs = [(sid, command) for sid, batch in by_system.items() for command in batch]
+        results = await asyncio.gather(
+            *(self.system_coordinators[sid].async_send(command) for sid, command in pairs),
+            return_exceptions=True,
+        )
+        failures = [
+            f"{sid} {command.label}: {result}"
+            for (sid, command), result in zip(pairs, results)
+            if isinstance(result, Exception)
+        ]
+        if failures:
+            raise HomeAssistantError(f"Failed to apply {', '.join(failures)}")
+
+    def _system_coordinator(self, system_id: str) -> KlereoSystemCoordinator:
+        """Return the coordinator of a known pool."""
+        coordinator = self.system_coordinators.get(system_id)
+        if coordinator is None:
+            raise HomeAssistantError(f"Unknown Klereo system {system_id}")
+        return coordinator
 
     async def async_set_output(
         self, system_id: str, out_index: int, mode: int, state: int
     ) -> Any:
-        """Send a set-output command and request a data refresh."""
+        """Queue a set-output command and hold the new state until confirmed."""
+        system_coordinator = self._system_coordinator(system_id)
         try:
-            result = await self.api.set_output(system_id, out_index, mode, state)
+            return await system_coordinator.async_send(
+                KlereoCommand(COMMAND_OUTPUT, out_index, (mode, state))
+            )
         except Exception as err:
             raise HomeAssistantError(
                 f"Failed to set output {out_index}: {err}"
             ) from err
-        await self.async_request_refresh()
-        return result
 
     async def async_set_param(self, system_id: str, param_id: str, value: Any) -> Any:
-        """Send a set-parameter command and request a data refresh."""
+        """Queue a set-parameter command and hold the new value until confirmed."""
+        system_coordinator = self._system_coordinator(system_id)
         try:
-            result = await self.api.set_param(system_id, param_id, value)
+            return await system_coordinator.async_send(
+                KlereoCommand(COMMAND_PARAM, param_id, value)
+            )
         except Exception as err:
             raise HomeAssistantError(
                 f"Failed to set parameter {param_id}: {err}"
             ) from err
-        await self.async_request_refresh()
-        return result
@@ -1,4 +1,5 @@
 """Diagnostics support for Klereo."""
+import time
 from dataclasses import asdict
 
 from homeassistant.components.diagnostics import async_redact_data
@@ -16,6 +17,7 @@ async def async_get_config_entry_diagnostics(
 ) -> dict:
     """Return diagnostics for a config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    now = time.monotonic()
     coordinator_data = {
         sys_id: asdict(system_data)
         for sys_id, system_data in coordinator.data.items()
@@ -23,4 +25,28 @@ async def async_get_config_entry_diagnostics(
     return {
         "config_entry": async_redact_data(entry.as_dict(), TO_REDACT),
         "coordinator_data": async_redact_data(coordinator_data, TO_REDACT),
+        "circuit_breakers": coordinator.api.circuit_breaker_states(),
+        "system_coordinators": {
+            sys_id: {
+                "last_update_success": system_coordinator.last_update_success,
+                "update_interval": str(system_coordinator.update_interval),
+                "scheduler": (
+                    system_coordinator.scheduler.as_dict()
+                    if system_coordinator.scheduler is not None
+                    else None
+                ),
+                "upload_cadence": system_coordinator.cadence.as_dict(now),
+                "commands": system_coordinator.command_status,
+                "raw_payloads": async_redact_data(
+                    {
+                        "index": coordinator.raw_index.get(sys_id),
+                        "details": system_coordinator.raw_details,
+                    }
+                    if coordinator.keep_raw_payloads
+                    else {},
+                    TO_REDACT,
+                ),
+            }
+            for sys_id, system_coordinator in coordinator.system_coordinators.items()
+        },
     }
@@ -1,26 +1,135 @@
 """Base entity for Klereo."""
-from collections.abc import Callable
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
-from .coordinator import KlereoCoordinator
+from .coordinator import KlereoCoordinator, KlereoSystemCoordinator
 from .models import KlereoPoolDetails
 
+_LOGGER = logging.getLogger(__name__)
+
 
 class KlereoEntity(CoordinatorEntity[KlereoCoordinator]):
-    """Base class for Klereo entities."""
+    """Base class for Klereo entities.
+
+    ``coordinator`` is the account coordinator (combined data, commands);
+    updates and availability come from the entity's own pool coordinator.
+    The ``(system_id, kind, key)`` listener context limits updates to the
+    ones that changed this entity's probe, output or parameter.
+    """
 
     _attr_has_entity_name = True
+    # KlereoCommand.label of the output/parameter this entity controls
+    _command_label: str | None = None
+    # Attribute holding the entity's state, compared to skip no-op writes
+    _state_attr = "_attr_native_value"
 
-    def __init__(self, coordinator: KlereoCoordinator, system_id: str) -> None:
-        """Initialize the entity."""
-        super().__init__(coordinator)
+    def __init__(
+        self, coordinator: KlereoCoordinator, system_id: str, kind: str, key: Any
+    ) -> None:
+        """Initialize the entity for the ``kind`` slice ``key`` of a pool."""
+        super().__init__(coordinator, context=(system_id, kind, key))
         self.system_id = system_id
+        # attribute -> (optimistic value, value to restore, owner token)
+        self._optimistic: dict[str, tuple[Any, Any, object]] = {}
+        self._last_written: tuple | None = None
+
+    @property
+    def system_coordinator(self) -> KlereoSystemCoordinator | None:
+        """Return the coordinator polling this entity's pool."""
+        return self.coordinator.system_coordinators.get(self.system_id)
+
+    @property
+    def available(self) -> bool:
+        """Return True if this entity's pool was polled successfully."""
+        system_coordinator = self.system_coordinator
+        return (
+            self._attr_available
+            and system_coordinator is not None
+            and system_coordinator.last_update_success
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Add the confirmation outcome of the last command, if any."""
+        attributes = super().extra_state_attributes
+        system_coordinator = self.system_coordinator
+        if self._command_label is None or system_coordinator is None:
+            return attributes
+        status = system_coordinator.command_status.get(self._command_label)
+        if status is None:
+            return attributes
+        return {**(attributes or {}), "command_status": status}
+
+    async def async_update(self) -> None:
+        """Refresh this entity's pool (generic update service)."""
+        if not self.enabled:
+            return
+        if (system_coordinator := self.system_coordinator) is not None:
+            await system_coordinator.async_request_refresh()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state if the update changed it.
+
+        Optimistic values are kept over pool data until their command ends;
+        the pool's value becomes the value to restore if the command fails.
+        """
+        for attr, (value, _, token) in self._optimistic.items():
+            self._optimistic[attr] = (value, getattr(self, attr), token)
+            setattr(self, attr, value)
+        written = self._written_state()
+        if written == self._last_written:
+            return
+        self._last_written = written
+        super()._handle_coordinator_update()
+
+    def _written_state(self) -> tuple:
+        """Return the state, availability and attributes a write would publish."""
+        return (
+            getattr(self, self._state_attr),
+            bool(self.available),
+            self.extra_state_attributes,
+        )
+
+    async def _async_optimistic(self, attr: str, value: Any, command: Awaitable[Any]) -> Any:
+        """Show ``value`` in ``attr`` while ``command`` runs.
+
+        Coordinator updates arriving meanwhile do not overwrite it. If the
+        command raises HomeAssistantError, the previous value is restored
+        at once, unless a newer optimistic write to ``attr`` took over.
+        """
+        token = object()
+        previous = self._optimistic.get(attr)
+        rollback = previous[1] if previous is not None else getattr(self, attr)
+        self._optimistic[attr] = (value, rollback, token)
+        setattr(self, attr, value)
+        self._async_write_local_state()
+        try:
+            return await command
+        except HomeAssistantError:
+            if self._optimistic.get(attr, (None, None, None))[2] is token:
+                setattr(self, attr, self._optimistic.pop(attr)[1])
+                self._async_write_local_state()
+            raise
+        finally:
+            if self._optimistic.get(attr, (None, None, None))[2] is token:
+                del self._optimistic[attr]
+
+    @callback
+    def _async_write_local_state(self) -> None:
+        """Write state the entity set itself, e.g. before sending a command."""
+        self._last_written = self._written_state()
+        self.async_write_ha_state()
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -39,27 +148,59 @@ def setup_discovery(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
-    extract_fn: Callable[[KlereoCoordinator, str, KlereoPoolDetails], list[KlereoEntity]],
+    extract_fn: Callable[
+        [KlereoCoordinator, str, KlereoPoolDetails],
+        list[tuple[str, Callable[[], KlereoEntity]]],
+    ],
 ) -> None:
     """Set up dynamic entity discovery for a platform.
 
     Args:
         extract_fn: Called with (coordinator, system_id, details) and returns
-            a list of (uid, entity) tuples for new entities to register.
+            a list of (uid, factory) tuples; ``factory()`` builds the entity
+            and is only called for uids not seen before.
+
+    After the first pass, only pools listed in the coordinator's
+    ``topology_changes`` are re-examined. Entities whose uid is no longer
+    extracted, or whose pool is gone, are removed from the entity registry.
     """
     coordinator: KlereoCoordinator = hass.data[DOMAIN][entry.entry_id]
-    known_ids: set[str] = set()
+    # system_id -> uid -> entity
+    known: dict[str, dict[str, KlereoEntity]] = {}
 
     @callback
-    def _discover() -> None:
+    def _scan(system_ids: Iterable[str]) -> None:
         new_entities: list[KlereoEntity] = []
-        for system_id, system_data in coordinator.data.items():
-            for uid, entity in extract_fn(coordinator, system_id, system_data.details):
-                if uid not in known_ids:
-                    known_ids.add(uid)
+        for system_id in system_ids:
+            system = coordinator.data.get(system_id)
+            current = (
+                dict(extract_fn(coordinator, system_id, system.details))
+                if system is not None
+                else {}
+            )
+            system_known = known.setdefault(system_id, {})
+            for uid, factory in current.items():
+                if uid not in system_known:
+                    system_known[uid] = entity = factory()
                     new_entities.append(entity)
+            for uid in system_known.keys() - current.keys():
+                _async_remove_entity(hass, system_known.pop(uid))
+            if not system_known:
+                del known[system_id]
         if new_entities:
             async_add_entities(new_entities)
 
-    _discover()
-    entry.async_on_unload(coordinator.async_add_listener(_discover))
+    _scan(list(coordinator.data))
+    entry.async_on_unload(
+        coordinator.async_add_listener(lambda: _scan(coordinator.topology_changes))
+    )
+
+
+@callback
+def _async_remove_entity(hass: HomeAssistant, entity: KlereoEntity) -> None:
+    """Remove an entity whose probe, output, parameter or pool vanished."""
+    _LOGGER.debug("Removing %s, no longer reported by its pool", entity.entity_id)
+    if entity.registry_entry is not None:
+        er.async_get(hass).async_remove(entity.entity_id)
+    elif entity.hass is not None:
+        hass.async_create_task(entity.async_remove())
@@ -1,18 +1,33 @@
-"""Typed data models for Klereo."""
+"""Typed data models for Klereo.
+
+Models are frozen and slotted, and keep only the fields the integration
+reads; the raw API payloads they are parsed from are not referenced (see
+the ``keep_raw_payloads`` option for diagnostics).
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections.abc import Mapping, ValuesView
+from dataclasses import dataclass, field, replace
 from typing import Any
 
+from .api import OUT_MODE_MAN
+
+COMMAND_OUTPUT = "output"
+COMMAND_PARAM = "param"
+
+# Kinds of per-entity slices of a pool, for keyed update dispatch
+KIND_PROBE = "probe"
+KIND_OUTPUT = COMMAND_OUTPUT
+KIND_PARAM = COMMAND_PARAM
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class KlereoProbe:
     """A Klereo probe sensor reading."""
 
     index: int
     type: int | None = None
     status: int | None = None
-    value: float | None = None
     filtered_value: float | None = None
     direct_value: float | None = None
 
@@ -23,20 +38,18 @@ class KlereoProbe:
             index=data["index"],
             type=data.get("type"),
             status=data.get("status"),
-            value=data.get("value"),
             filtered_value=data.get("filteredValue"),
             direct_value=data.get("directValue"),
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class KlereoOutput:
     """A Klereo controllable output."""
 
     index: int
     status: int = 0
     mode: int = 0
-    type: int = 0
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> KlereoOutput:
@@ -45,17 +58,15 @@ class KlereoOutput:
             index=data["index"],
             status=data.get("status", 0),
             mode=data.get("mode", 0),
-            type=data.get("type", 0),
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class KlereoSystemInfo:
     """Metadata for a Klereo pool system."""
 
     id_system: str
     pool_nickname: str = "Klereo Pool"
-    raw: dict[str, Any] = field(default_factory=dict)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> KlereoSystemInfo:
@@ -63,43 +74,155 @@ class KlereoSystemInfo:
         return cls(
             id_system=data.get("idSystem", ""),
             pool_nickname=data.get("poolNickname", "Klereo Pool"),
-            raw=data,
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class KlereoCommand:
+    """A requested change to one output or RegulModes parameter.
+
+    ``key`` is the output index or the parameter name; ``value`` is a
+    ``(mode, status)`` tuple for outputs and the raw value for parameters.
+    Outside manual mode the controller drives an output's status, so only
+    the mode of such a command is expected back.
+    """
+
+    kind: str
+    key: int | str
+    value: Any
+
+    @property
+    def label(self) -> str:
+        """Return a stable identifier, e.g. ``output_1`` or ``param_ConsigneEau``."""
+        return f"{self.kind}_{self.key}"
+
+
+@dataclass(frozen=True, slots=True)
+class KlereoTopology:
+    """Which probes (index, type), outputs and RegulModes keys a pool reports."""
+
+    probes: frozenset[tuple[int, int | None]] = frozenset()
+    outputs: frozenset[int] = frozenset()
+    params: frozenset[str] = frozenset()
+
+    def __sub__(self, other: KlereoTopology) -> KlereoTopology:
+        """Return what this topology has that ``other`` does not."""
+        return KlereoTopology(
+            self.probes - other.probes,
+            self.outputs - other.outputs,
+            self.params - other.params,
+        )
+
+    def __bool__(self) -> bool:
+        """Return True if anything is present."""
+        return bool(self.probes or self.outputs or self.params)
+
+
+@dataclass(frozen=True, slots=True)
+class KlereoTopologyDiff:
+    """What appeared in and vanished from a pool since the previous update."""
+
+    added: KlereoTopology = KlereoTopology()
+    removed: KlereoTopology = KlereoTopology()
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    """Compare API values, treating 28 and 28.0 (or "28") as equal."""
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return a == b
+
+
+@dataclass(frozen=True, slots=True)
 class KlereoPoolDetails:
-    """Parsed pool details for a single system."""
+    """Parsed pool details for a single system, keyed by probe/output index."""
 
-    probes: list[KlereoProbe] = field(default_factory=list)
-    outs: list[KlereoOutput] = field(default_factory=list)
-    regul_modes: dict[str, Any] = field(default_factory=dict)
     probe_index: dict[int, KlereoProbe] = field(default_factory=dict)
     output_index: dict[int, KlereoOutput] = field(default_factory=dict)
+    regul_modes: dict[str, Any] = field(default_factory=dict)
+    pool_mode: int | None = None
 
     @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> KlereoPoolDetails:
+    def from_dict(cls, data: Mapping[str, Any]) -> KlereoPoolDetails:
         """Parse pool details from the API."""
-        probes = [
+        probes = (
             KlereoProbe.from_dict(p)
             for p in data.get("probes", [])
             if p.get("index") is not None
-        ]
-        outs = [
+        )
+        outs = (
             KlereoOutput.from_dict(o)
             for o in data.get("outs", [])
             if o.get("index") is not None
-        ]
+        )
         return cls(
-            probes=probes,
-            outs=outs,
-            regul_modes=dict(data.get("RegulModes", {})),
             probe_index={p.index: p for p in probes},
             output_index={o.index: o for o in outs},
+            regul_modes=dict(data.get("RegulModes", {})),
+            pool_mode=data.get("PoolMode"),
+        )
+
+    @property
+    def probes(self) -> ValuesView[KlereoProbe]:
+        """Return the pool's probes."""
+        return self.probe_index.values()
+
+    @property
+    def outs(self) -> ValuesView[KlereoOutput]:
+        """Return the pool's outputs."""
+        return self.output_index.values()
+
+    @property
+    def topology(self) -> KlereoTopology:
+        """Return which probes, outputs and parameters exist."""
+        return KlereoTopology(
+            frozenset((p.index, p.type) for p in self.probes),
+            frozenset(self.output_index),
+            frozenset(self.regul_modes),
+        )
+
+    def with_output(
+        self, index: int, mode: int, status: int | None = None
+    ) -> KlereoPoolDetails:
+        """Return a copy with one output's mode (and status, if given) replaced."""
+        output = self.output_index.get(index)
+        if output is None:
+            return self
+        if status is None:
+            status = output.status
+        return replace(
+            self,
+            output_index={**self.output_index, index: replace(output, mode=mode, status=status)},
+        )
+
+    def with_param(self, key: str, value: Any) -> KlereoPoolDetails:
+        """Return a copy with one RegulModes entry replaced."""
+        return replace(self, regul_modes={**self.regul_modes, key: value})
+
+    def with_command(self, command: KlereoCommand) -> KlereoPoolDetails:
+        """Return a copy showing the state ``command`` asks for."""
+        if command.kind == COMMAND_OUTPUT:
+            mode, status = command.value
+            return self.with_output(command.key, mode, status if mode == OUT_MODE_MAN else None)
+        return self.with_param(command.key, command.value)
+
+    def satisfies(self, command: KlereoCommand) -> bool:
+        """Return True if these details already reflect ``command``."""
+        if command.kind == COMMAND_OUTPUT:
+            output = self.output_index.get(command.key)
+            if output is None:
+                return False
+            mode, status = command.value
+            return _same_value(output.mode, mode) and (
+                mode != OUT_MODE_MAN or _same_value(output.status, status)
+            )
+        return command.key in self.regul_modes and _same_value(
+            self.regul_modes[command.key], command.value
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class KlereoSystemData:
     """Combined info + details for a single pool system."""
 
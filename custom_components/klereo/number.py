@@ -1,26 +1,30 @@
 """Number platform for Klereo."""
+import asyncio
 import logging
+from functools import partial
+from typing import Any
 
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import PARAM_TYPES
 from .entity import KlereoEntity, setup_discovery
-from .models import KlereoPoolDetails
+from .models import KIND_PARAM, KlereoPoolDetails
 
 _LOGGER = logging.getLogger(__name__)
 
 
 def _extract_numbers(coordinator, system_id, details: KlereoPoolDetails):
-    """Extract number entities from system details."""
+    """Describe number entities found in system details."""
     items = []
     for key, value in details.regul_modes.items():
         if key not in PARAM_TYPES:
             continue
         uid = f"{system_id}_number_{key}"
-        items.append((uid, KlereoNumber(coordinator, system_id, key, value)))
+        items.append((uid, partial(KlereoNumber, coordinator, system_id, key, value)))
     return items
 
 
@@ -40,17 +44,22 @@ class KlereoNumber(KlereoEntity, NumberEntity):
 
     def __init__(self, coordinator, system_id, key, initial_value):
         """Initialize the number entity."""
-        super().__init__(coordinator, system_id)
+        super().__init__(coordinator, system_id, KIND_PARAM, key)
         self._key = key
         param = PARAM_TYPES[key]
 
         self._attr_unique_id = f"{system_id}_number_{key}"
+        self._command_label = f"param_{key}"
         self._attr_name = param["name"]
         self._attr_native_unit_of_measurement = param.get("unit")
         self._attr_native_min_value = param.get("min", 0)
         self._attr_native_max_value = param.get("max", 100)
         self._attr_native_step = param.get("step", 1)
         self._attr_native_value = initial_value
+        # Debounce state: the pending send timer and the future every caller
+        # in the window awaits.
+        self._debounce_handle: asyncio.TimerHandle | None = None
+        self._pending_write: asyncio.Future[None] | None = None
 
     @callback
     def _handle_coordinator_update(self):
@@ -66,7 +75,63 @@ class KlereoNumber(KlereoEntity, NumberEntity):
         super()._handle_coordinator_update()
 
     async def async_set_native_value(self, value: float) -> None:
-        """Set the parameter value."""
-        self._attr_native_value = value
-        self.async_write_ha_state()
-        await self.coordinator.async_set_param(self.system_id, self._key, value)
+        """Set the parameter value.
+
+        The value is shown at once, but only the last value set within the
+        coordinator's ``number_debounce`` window is sent. Every caller in
+        the window waits for that write; if it fails, the value from before
+        the window is restored.
+        """
+        await self._async_optimistic("_attr_native_value", value, self._async_debounced(value))
+
+    async def _async_debounced(self, value: float) -> None:
+        """Send ``value`` once the debounce window closes."""
+        delay = self.coordinator.number_debounce
+        if delay <= 0:
+            await self.coordinator.async_set_param(self.system_id, self._key, value)
+            return
+
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+        if self._pending_write is None:
+            self._pending_write = self.hass.loop.create_future()
+        future = self._pending_write
+        self._debounce_handle = self.hass.loop.call_later(delay, self._start_send)
+        await asyncio.shield(future)
+
+    @callback
+    def _start_send(self) -> None:
+        """Close the debounce window and send its last value."""
+        future, self._pending_write = self._pending_write, None
+        self._debounce_handle = None
+        self.hass.async_create_task(self._async_send(self._attr_native_value, future))
+
+    async def _async_send(self, value: Any, future: asyncio.Future[None]) -> None:
+        """Send the window's value and resolve its callers' future."""
+        try:
+            await self.coordinator.async_set_param(self.system_id, self._key, value)
+        except HomeAssistantError as err:
+            if not future.done():
+                future.set_exception(err)
+            return
+        except BaseException as err:
+            # Shutdown cancels queued commands; never leave the window's
+            # callers waiting on an unresolved future.
+            if not future.done():
+                if isinstance(err, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(err)
+            raise
+        if not future.done():
+            future.set_result(None)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop a pending debounced write."""
+        await super().async_will_remove_from_hass()
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+            self._debounce_handle = None
+        if self._pending_write is not None:
+            self._pending_write.cancel()
+            self._pending_write = None
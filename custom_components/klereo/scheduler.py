@@ -0,0 +1,212 @@
+"""Adaptive poll scheduling and upload cadence learning for Klereo pools."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from datetime import timedelta
+from itertools import pairwise
+from statistics import median
+
+from .const import (
+    ADAPTIVE_ACTIVE_OUTPUTS,
+    ADAPTIVE_IDLE_CYCLES,
+    CADENCE_FETCH_MARGIN,
+    CADENCE_MAX_MISSES,
+    CADENCE_MIN_PERIOD,
+    CADENCE_MIN_SAMPLES,
+    CADENCE_SAMPLES,
+    POOL_MODE_WINTER,
+)
+from .models import KlereoPoolDetails, KlereoSystemData
+
+STATE_INITIAL = "initial"
+STATE_ACTIVE = "active"
+STATE_CHANGED = "changed"
+STATE_STEADY = "steady"
+STATE_IDLE = "idle"
+STATE_WINTER = "winter"
+
+
+def _outputs_changed(previous: KlereoPoolDetails, current: KlereoPoolDetails) -> bool:
+    """Return True if any output was added, removed or switched."""
+    return {o.index: (o.status, o.mode) for o in previous.outs} != {
+        o.index: (o.status, o.mode) for o in current.outs
+    }
+
+
+def _regulating(details: KlereoPoolDetails) -> bool:
+    """Return True while filtration or heating is running."""
+    return any(
+        (out := details.output_index.get(index)) is not None and out.status
+        for index in ADAPTIVE_ACTIVE_OUTPUTS
+    )
+
+
+class AdaptivePollScheduler:
+    """Pick a pool's next poll interval from what its last poll showed.
+
+    - winter mode: ``max_interval``
+    - outputs switched, or filtration/heating running: ``min_interval``
+    - other changes (probes, setpoints): ``base_interval``
+    - ``idle_cycles`` unchanged polls in a row: the interval doubles per
+      further unchanged poll, up to ``max_interval``
+
+    Unchanged means the coordinator returned the previous data object.
+    Every result is clamped to the min/max bounds.
+    """
+
+    def __init__(
+        self,
+        base_interval: timedelta,
+        min_interval: timedelta,
+        max_interval: timedelta,
+        idle_cycles: int = ADAPTIVE_IDLE_CYCLES,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.idle_cycles = idle_cycles
+        self.state = STATE_INITIAL
+        self._unchanged = 0
+
+    def _clamp(self, interval: timedelta) -> timedelta:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def next_interval(
+        self, previous: KlereoSystemData | None, current: KlereoSystemData
+    ) -> timedelta:
+        """Return the interval until the next poll after ``current``."""
+        if current is previous:
+            self._unchanged += 1
+        else:
+            self._unchanged = 0
+        details = current.details
+
+        if details.pool_mode == POOL_MODE_WINTER:
+            self.state = STATE_WINTER
+            return self.max_interval
+        if previous is None:
+            self.state = STATE_INITIAL
+            return self._clamp(self.base_interval)
+        if _regulating(details) or (
+            current is not previous and _outputs_changed(previous.details, details)
+        ):
+            self.state = STATE_ACTIVE
+            return self.min_interval
+        if self._unchanged < self.idle_cycles:
+            self.state = STATE_CHANGED if self._unchanged == 0 else STATE_STEADY
+            return self._clamp(self.base_interval)
+
+        self.state = STATE_IDLE
+        return self._clamp(self.base_interval * 2 ** (self._unchanged - self.idle_cycles + 1))
+
+    def as_dict(self) -> dict:
+        """Return the scheduler state for diagnostics."""
+        return {
+            "state": self.state,
+            "unchanged_polls": self._unchanged,
+            "min_interval": str(self.min_interval),
+            "max_interval": str(self.max_interval),
+        }
+
+
+class UploadCadenceTracker:
+    """Learn when a pool uploads to the cloud and time polls just after.
+
+    Every poll that sees new content brackets an upload between the previous
+    poll and this one. The period is the median gap between those polls; the
+    phase is the intersection of the recent brackets projected onto the
+    latest one, so it tightens as samples accumulate.
+
+    Times are ``time.monotonic()`` seconds.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._windows: deque[tuple[float, float]] = deque(maxlen=CADENCE_SAMPLES)
+        self._last_poll: float | None = None
+        self._expected: float | None = None
+        self._misses = 0
+        self._last_missed = False
+        self.period: float | None = None
+        # Latest time by which the most recent upload had happened
+        self.anchor: float | None = None
+        self.uncertainty: float | None = None
+
+    def observe(self, changed: bool, now: float) -> None:
+        """Record a successful poll and whether its content changed."""
+        missed = not changed and self._expected is not None and now >= self._expected
+        if changed and self._last_poll is not None:
+            self._windows.append((self._last_poll, now))
+            self._misses = 0
+            self._fit()
+        elif missed:
+            # The aligned poll found nothing: the controller skipped or drifted.
+            self._misses += 1
+            if self._misses >= CADENCE_MAX_MISSES:
+                self._windows.clear()
+                self._misses = 0
+                self.period = self.anchor = self.uncertainty = None
+        self._last_missed = missed
+        self._expected = None
+        self._last_poll = now
+
+    def interrupt(self) -> None:
+        """Forget the last poll after content changed for another reason.
+
+        Used when a command is sent: the next change comes from the command,
+        not an upload, so no bracket may span it.
+        """
+        self._last_poll = None
+        self._expected = None
+        self._last_missed = False
+
+    def _fit(self) -> None:
+        """Re-estimate period and phase from the recorded windows."""
+        if len(self._windows) < CADENCE_MIN_SAMPLES:
+            return
+        period = median(b[1] - a[1] for a, b in pairwise(self._windows))
+        if period < CADENCE_MIN_PERIOD:
+            self.period = self.anchor = self.uncertainty = None
+            return
+        lo, hi = self._windows[-1]
+        for w_lo, w_hi in self._windows:
+            shift = round((self._windows[-1][1] - w_hi) / period) * period
+            lo, hi = max(lo, w_lo + shift), min(hi, w_hi + shift)
+        if lo >= hi:
+            # Inconsistent history (drift, command-triggered changes).
+            lo, hi = self._windows[-1]
+        self.period, self.anchor, self.uncertainty = period, hi, hi - lo
+
+    def next_delay(self, interval: float, now: float) -> float | None:
+        """Return seconds until the aligned poll, or None to keep ``interval``.
+
+        Picks the last expected upload within ``interval`` from now, or the
+        first one after it when none falls inside, so the request rate stays
+        at or below the unaligned one. After an aligned poll found no new
+        data, the next poll falls back to ``interval``.
+        """
+        if self.period is None or self.anchor is None or self._last_missed:
+            return None
+        base = self.anchor + CADENCE_FETCH_MARGIN
+        # The upload bracketed by the anchor was already fetched.
+        target = base + max(1, math.floor((now + interval - base) / self.period)) * self.period
+        while target <= now:
+            target += self.period
+        self._expected = target
+        return target - now
+
+    def as_dict(self, now: float) -> dict:
+        """Return the learned model for diagnostics."""
+        next_upload = None
+        if self.period is not None and self.anchor is not None:
+            elapsed = (now - self.anchor) % self.period
+            next_upload = round(self.period - elapsed, 1)
+        return {
+            "samples": len(self._windows),
+            "period_seconds": self.period,
+            "phase_uncertainty_seconds": self.uncertainty,
+            "next_upload_in_seconds": next_upload,
+            "missed_aligned_polls": self._misses,
+        }
@@ -1,5 +1,6 @@
 """Select platform for Klereo."""
 import logging
+from functools import partial
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.config_entries import ConfigEntry
@@ -9,7 +10,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .api import OUTPUT_MODES
 from .const import OUTPUT_NAMES
 from .entity import KlereoEntity, setup_discovery
-from .models import KlereoOutput, KlereoPoolDetails
+from .models import KIND_OUTPUT, KlereoOutput, KlereoPoolDetails
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,11 +19,11 @@ _MODE_BY_LABEL = {v: k for k, v in OUTPUT_MODES.items()}
 
 
 def _extract_selects(coordinator, system_id, details: KlereoPoolDetails):
-    """Extract output mode selects from system details."""
+    """Describe output mode selects found in system details."""
     items = []
     for output in details.outs:
         uid = f"{system_id}_output_mode_{output.index}"
-        items.append((uid, KlereoOutputModeSelect(coordinator, system_id, output)))
+        items.append((uid, partial(KlereoOutputModeSelect, coordinator, system_id, output)))
     return items
 
 
@@ -39,13 +40,15 @@ class KlereoOutputModeSelect(KlereoEntity, SelectEntity):
     """Representation of a Klereo output mode selector."""
 
     _attr_options = list(OUTPUT_MODES.values())
+    _state_attr = "_attr_current_option"
 
     def __init__(self, coordinator, system_id, output: KlereoOutput):
         """Initialize the select entity."""
-        super().__init__(coordinator, system_id)
+        super().__init__(coordinator, system_id, KIND_OUTPUT, output.index)
         self._output_index = output.index
 
         self._attr_unique_id = f"{system_id}_output_mode_{self._output_index}"
+        self._command_label = f"output_{self._output_index}"
         self._attr_name = f"{OUTPUT_NAMES.get(self._output_index, f'Output {self._output_index}')} Mode"
 
         self._update_from_output(output)
@@ -92,8 +95,10 @@ class KlereoOutputModeSelect(KlereoEntity, SelectEntity):
             except (ValueError, TypeError):
                 current_state = 0
 
-        self._attr_current_option = option
-        self.async_write_ha_state()
-        await self.coordinator.async_set_output(
-            self.system_id, self._output_index, mode, current_state
+        await self._async_optimistic(
+            "_attr_current_option",
+            option,
+            self.coordinator.async_set_output(
+                self.system_id, self._output_index, mode, current_state
+            ),
         )
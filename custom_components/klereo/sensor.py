@@ -1,15 +1,19 @@
 """Sensor platform for Klereo."""
 import logging
 import re
+import time
+from functools import partial
+from typing import Any
 
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import BINARY_SENSOR_TYPES, PARAM_NAMES, PARAM_TYPES, SENSOR_TYPES
 from .entity import KlereoEntity, setup_discovery
-from .models import KlereoPoolDetails, KlereoProbe
+from .models import KIND_PARAM, KIND_PROBE, KlereoPoolDetails, KlereoProbe
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,19 +24,21 @@ def _humanize_key(key: str) -> str:
 
 
 def _extract_sensors(coordinator, system_id, details: KlereoPoolDetails):
-    """Extract probe sensors and param sensors from system details."""
+    """Describe probe, probe status and param sensors found in system details."""
     items = []
     for probe in details.probes:
+        uid = f"{system_id}_sensor_{probe.index}_status"
+        items.append((uid, partial(KlereoProbeStatusSensor, coordinator, system_id, probe)))
         if probe.type in BINARY_SENSOR_TYPES:
             continue
         uid = f"{system_id}_sensor_{probe.index}"
-        items.append((uid, KlereoSensor(coordinator, system_id, probe)))
+        items.append((uid, partial(KlereoSensor, coordinator, system_id, probe)))
 
     for key, value in details.regul_modes.items():
         if key in PARAM_TYPES:
             continue
         uid = f"{system_id}_param_{key}"
-        items.append((uid, KlereoParamSensor(coordinator, system_id, key, value)))
+        items.append((uid, partial(KlereoParamSensor, coordinator, system_id, key, value)))
     return items
 
 
@@ -46,11 +52,18 @@ async def async_setup_entry(
 
 
 class KlereoSensor(KlereoEntity, SensorEntity):
-    """Representation of a Klereo probe sensor."""
+    """Representation of a Klereo probe sensor.
+
+    The probe type is reflected in the name, unit and device class; the
+    probe status is an attribute kept out of the recorder (see
+    ``KlereoProbeStatusSensor`` for its history).
+    """
+
+    _unrecorded_attributes = frozenset({"status"})
 
     def __init__(self, coordinator, system_id, probe: KlereoProbe):
         """Initialize the sensor."""
-        super().__init__(coordinator, system_id)
+        super().__init__(coordinator, system_id, KIND_PROBE, probe.index)
         self._index = probe.index
         self._type = probe.type
 
@@ -65,6 +78,10 @@ class KlereoSensor(KlereoEntity, SensorEntity):
         if state_class:
             self._attr_state_class = SensorStateClass(state_class)
 
+        self._attr_extra_state_attributes: dict[str, Any] = {}
+        self._attr_native_value = None
+        # time.monotonic() of the last published value, for the heartbeat
+        self._published_at = 0.0
         self._update_from_probe(probe)
 
     @callback
@@ -83,11 +100,30 @@ class KlereoSensor(KlereoEntity, SensorEntity):
         value = probe.filtered_value
         if value is None:
             value = probe.direct_value
+        self._publish(value)
+        if self._attr_extra_state_attributes.get("status") != probe.status:
+            self._attr_extra_state_attributes = {"status": probe.status}
+
+    def _publish(self, value: Any) -> None:
+        """Round a reading and publish it if it left the deadband.
+
+        Readings within the probe type's deadband of the published value are
+        held back until the coordinator's ``sensor_heartbeat`` has passed.
+        """
+        sensor_filter = self.coordinator.sensor_filters.get(self._type)
+        now = time.monotonic()
+        if sensor_filter is not None and isinstance(value, int | float):
+            deadband, precision = sensor_filter
+            value = round(value, precision)
+            published = self._attr_native_value
+            if (
+                isinstance(published, int | float)
+                and round(abs(value - published), precision) < deadband
+                and now - self._published_at < self.coordinator.sensor_heartbeat
+            ):
+                return
         self._attr_native_value = value
-        self._attr_extra_state_attributes = {
-            "type": probe.type,
-            "status": probe.status,
-        }
+        self._published_at = now
 
     def _find_my_probe(self) -> KlereoProbe | None:
         """Find this probe's data in the coordinator data."""
@@ -97,12 +133,39 @@ class KlereoSensor(KlereoEntity, SensorEntity):
         return system.details.probe_index.get(self._index)
 
 
+class KlereoProbeStatusSensor(KlereoEntity, SensorEntity):
+    """Diagnostic sensor for a probe's status code, disabled by default."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, system_id, probe: KlereoProbe):
+        """Initialize the probe status sensor."""
+        super().__init__(coordinator, system_id, KIND_PROBE, probe.index)
+        self._index = probe.index
+        sensor_def = SENSOR_TYPES.get(probe.type) or BINARY_SENSOR_TYPES.get(probe.type, {})
+
+        self._attr_unique_id = f"{system_id}_sensor_{self._index}_status"
+        self._attr_name = f"{sensor_def.get('name', f'Sensor {self._index}')} Status"
+        self._attr_native_value = probe.status
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Handle updated data from the coordinator."""
+        system = self.coordinator.data.get(self.system_id)
+        probe = system.details.probe_index.get(self._index) if system is not None else None
+        self._attr_available = probe is not None
+        if probe is not None:
+            self._attr_native_value = probe.status
+        super()._handle_coordinator_update()
+
+
 class KlereoParamSensor(KlereoEntity, SensorEntity):
     """Representation of a Klereo regulation parameter as a sensor."""
 
     def __init__(self, coordinator, system_id, key, initial_value):
         """Initialize the parameter sensor."""
-        super().__init__(coordinator, system_id)
+        super().__init__(coordinator, system_id, KIND_PARAM, key)
         self._key = key
 
         self._attr_unique_id = f"{system_id}_param_{key}"
@@ -1,5 +1,7 @@
 """Switch platform for Klereo."""
 import logging
+from functools import partial
+from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
@@ -9,17 +11,17 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .api import OUT_MODE_MAN, OUT_STATE_OFF, OUT_STATE_ON
 from .const import OUTPUT_NAMES
 from .entity import KlereoEntity, setup_discovery
-from .models import KlereoOutput, KlereoPoolDetails
+from .models import KIND_OUTPUT, KlereoOutput, KlereoPoolDetails
 
 _LOGGER = logging.getLogger(__name__)
 
 
 def _extract_switches(coordinator, system_id, details: KlereoPoolDetails):
-    """Extract output switches from system details."""
+    """Describe output switches found in system details."""
     items = []
     for output in details.outs:
         uid = f"{system_id}_output_{output.index}"
-        items.append((uid, KlereoSwitch(coordinator, system_id, output)))
+        items.append((uid, partial(KlereoSwitch, coordinator, system_id, output)))
     return items
 
 
@@ -33,18 +35,27 @@ async def async_setup_entry(
 
 
 class KlereoSwitch(KlereoEntity, SwitchEntity):
-    """Representation of a Klereo output switch."""
+    """Representation of a Klereo output switch.
+
+    The output mode is an attribute kept out of the recorder; its history
+    is recorded by the output's mode select entity.
+    """
+
+    _state_attr = "_attr_is_on"
+    _unrecorded_attributes = frozenset({"mode"})
 
     def __init__(self, coordinator, system_id, output: KlereoOutput):
         """Initialize the switch."""
-        super().__init__(coordinator, system_id)
+        super().__init__(coordinator, system_id, KIND_OUTPUT, output.index)
         self._output_index = output.index
 
         self._attr_unique_id = f"{system_id}_output_{self._output_index}"
+        self._command_label = f"output_{self._output_index}"
         self._attr_name = OUTPUT_NAMES.get(
             self._output_index, f"Output {self._output_index}"
         )
 
+        self._attr_extra_state_attributes: dict[str, Any] = {}
         self._update_from_output(output)
 
     @callback
@@ -69,10 +80,8 @@ class KlereoSwitch(KlereoEntity, SwitchEntity):
                 self._attr_is_on = False
         else:
             self._attr_is_on = False
-        self._attr_extra_state_attributes = {
-            "mode": output.mode,
-            "type": output.type,
-        }
+        if self._attr_extra_state_attributes.get("mode") != output.mode:
+            self._attr_extra_state_attributes = {"mode": output.mode}
 
     def _find_my_output(self) -> KlereoOutput | None:
         """Find this output's data in the coordinator data."""
@@ -83,16 +92,20 @@ class KlereoSwitch(KlereoEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn the output on (Manual mode, ON state)."""
-        self._attr_is_on = True
-        self.async_write_ha_state()
-        await self.coordinator.async_set_output(
-            self.system_id, self._output_index, OUT_MODE_MAN, OUT_STATE_ON
+        await self._async_optimistic(
+            "_attr_is_on",
+            True,
+            self.coordinator.async_set_output(
+                self.system_id, self._output_index, OUT_MODE_MAN, OUT_STATE_ON
+            ),
         )
 
     async def async_turn_off(self, **kwargs):
         """Turn the output off (Manual mode, OFF state)."""
-        self._attr_is_on = False
-        self.async_write_ha_state()
-        await self.coordinator.async_set_output(
-            self.system_id, self._output_index, OUT_MODE_MAN, OUT_STATE_OFF
+        await self._async_optimistic(
+            "_attr_is_on",
+            False,
+            self.coordinator.async_set_output(
+                self.system_id, self._output_index, OUT_MODE_MAN, OUT_STATE_OFF
+            ),
         )
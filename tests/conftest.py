@@ -1,4 +1,5 @@
 """Shared test fixtures for Klereo integration tests."""
+import json
 from unittest.mock import AsyncMock
 
 import pytest
@@ -43,7 +44,7 @@ def mock_api():
     """Create a mock KlereoApi."""
     api = AsyncMock(spec=KlereoApi)
     api.get_systems.return_value = MOCK_SYSTEMS_RESPONSE
-    api.get_pool_details.return_value = MOCK_DETAILS_RESPONSE
+    api.get_pool_details_raw.return_value = json.dumps(MOCK_DETAILS_RESPONSE).encode()
     api.login.return_value = None
     api.set_output.return_value = {"response": "ok"}
     api.set_param.return_value = {"response": "ok"}
@@ -1,11 +1,38 @@
 """Tests for the Klereo API client."""
+import asyncio
+import base64
 import json
+import time
 from unittest.mock import AsyncMock, MagicMock
 
 import aiohttp
 import pytest
 
-from custom_components.klereo.api import KlereoApi, KlereoApiError
+from custom_components.klereo import api as api_module
+from custom_components.klereo.api import (
+    API_URL_GET_INDEX,
+    API_URL_GET_POOL_DETAILS,
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    TOKEN_RENEW_MARGIN,
+    CircuitBreaker,
+    KlereoApi,
+    KlereoApiError,
+    KlereoCircuitOpenError,
+    RateLimiter,
+    decode_body,
+    decode_jwt_expiry,
+    get_rate_limiter,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    """Give every test fresh, full rate-limit buckets."""
+    api_module._RATE_LIMITERS.clear()
+    yield
+    api_module._RATE_LIMITERS.clear()
 
 
 @pytest.fixture
@@ -26,7 +53,11 @@ def mock_session():
 @pytest.fixture
 def api(mock_session):
     """Create a KlereoApi instance with mock session."""
-    return KlereoApi("test@example.com", "a94a8fe5ccb19ba61c4c0873d391e987982fbbd3", mock_session)
+    api = KlereoApi(
+        "test@example.com", "a94a8fe5ccb19ba61c4c0873d391e987982fbbd3", mock_session, backoff_base=0
+    )
+    yield api
+    api.close()
 
 
 def _make_response(data, status=200):
@@ -39,10 +70,17 @@ def _make_response(data, status=200):
             request_info=MagicMock(), history=(), status=status
         )
     response.json = AsyncMock(return_value=data)
-    response.text = AsyncMock(return_value=json.dumps(data))
+    response.read = AsyncMock(return_value=json.dumps(data).encode())
     return response
 
 
+def _make_jwt(exp: float) -> str:
+    """Build an unsigned JWT carrying the given exp claim."""
+    def _b64(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+    return f"{_b64({'alg': 'HS256'})}.{_b64({'exp': exp})}.sig"
+
+
 class TestLogin:
     """Tests for the login method."""
 
@@ -72,14 +110,122 @@ class TestLogin:
         assert call_kwargs.kwargs["data"]["password"] == "a94a8fe5ccb19ba61c4c0873d391e987982fbbd3"
 
 
+class TestTokenLifecycle:
+    """Tests for proactive JWT renewal."""
+
+    def test_decode_jwt_expiry(self):
+        """Should extract the exp claim from a JWT payload."""
+        assert decode_jwt_expiry(_make_jwt(1700000000)) == 1700000000
+
+    def test_decode_jwt_expiry_opaque_token(self):
+        """Opaque (non-JWT) tokens have no known expiry."""
+        assert decode_jwt_expiry("my-token") is None
+
+    async def test_login_notifies_token_listener(self, mock_session):
+        """Login should hand the new token and expiry to the listener."""
+        listener = MagicMock()
+        api = KlereoApi("test@example.com", "hash", mock_session, token_listener=listener)
+        exp = time.time() + 3600
+        token = _make_jwt(exp)
+        mock_session.post.return_value = _make_response({"jwt": token})
+        await api.login()
+        listener.assert_called_once_with(token, exp)
+
+    async def test_restored_token_skips_login(self, api, mock_session):
+        """A restored, unexpired token should be used without logging in."""
+        assert api.restore_token("stored-token", time.time() + 3600)
+        mock_session.request.return_value = _make_response({"data": "value"})
+        await api._request("GET", "https://example.com/api")
+        mock_session.post.assert_not_called()
+        headers = mock_session.request.call_args.kwargs["headers"]
+        assert headers["Authorization"] == "Bearer stored-token"
+
+    def test_restore_expired_token_rejected(self, api):
+        """An expired stored token should be discarded."""
+        assert not api.restore_token("stale-token", time.time() - 10)
+        assert api._token is None
+
+    async def test_login_records_expiry(self, api, mock_session):
+        """Login should store the token expiry."""
+        exp = time.time() + 3600
+        mock_session.post.return_value = _make_response({"jwt": _make_jwt(exp)})
+        await api.login()
+        assert api._token_expires_at == exp
+
+    async def test_expired_token_relogs_before_request(self, api, mock_session):
+        """An expired token should be renewed before sending, avoiding a 401."""
+        api._token = "old-token"
+        api._token_expires_at = time.time() - 10
+        mock_session.post.return_value = _make_response({"jwt": _make_jwt(time.time() + 3600)})
+        mock_session.request.return_value = _make_response({"data": "value"})
+        result = await api._request("GET", "https://example.com/api")
+        assert result == {"data": "value"}
+        assert mock_session.post.call_count == 1
+        assert mock_session.request.call_count == 1
+        headers = mock_session.request.call_args.kwargs["headers"]
+        assert headers["Authorization"] != "Bearer old-token"
+
+    async def test_near_expiry_renews_in_background(self, api, mock_session):
+        """A token close to expiry is used as-is while renewal runs in the background."""
+        api._token = "old-token"
+        api._token_expires_at = time.time() + 120
+        new_token = _make_jwt(time.time() + 3600)
+        mock_session.post.return_value = _make_response({"jwt": new_token})
+        mock_session.request.return_value = _make_response({"data": "value"})
+        await api._request("GET", "https://example.com/api")
+        headers = mock_session.request.call_args.kwargs["headers"]
+        assert headers["Authorization"] == "Bearer old-token"
+        await api._renew_task
+        assert api._token == new_token
+
+    async def test_background_renewal_failure_keeps_token(self, api, mock_session):
+        """A failed background renewal should keep the still-valid token."""
+        api._token = "old-token"
+        api._token_expires_at = time.time() + 120
+        mock_session.post.side_effect = aiohttp.ClientConnectionError("down")
+        mock_session.request.return_value = _make_response({"data": "value"})
+        await api._request("GET", "https://example.com/api")
+        await asyncio.wait_for(api._renew_task, 1)
+        assert api._token == "old-token"
+
+
+    async def test_login_arms_renewal_timer(self, api, mock_session):
+        """Login should schedule renewal TOKEN_RENEW_MARGIN before expiry."""
+        exp = time.time() + 3600
+        mock_session.post.return_value = _make_response({"jwt": _make_jwt(exp)})
+        await api.login()
+        loop = asyncio.get_running_loop()
+        remaining = api._renew_handle.when() - loop.time()
+        assert 3600 - TOKEN_RENEW_MARGIN - 5 < remaining <= 3600 - TOKEN_RENEW_MARGIN
+
+    async def test_renewal_timer_renews_without_requests(self, api, mock_session):
+        """The token should be renewed even if no request lands in the margin."""
+        new_token = _make_jwt(time.time() + 3600)
+        mock_session.post.return_value = _make_response({"jwt": new_token})
+        assert api.restore_token("old-token", time.time() + TOKEN_RENEW_MARGIN - 1)
+        while api._renew_task is None:
+            await asyncio.sleep(0)
+        await asyncio.wait_for(api._renew_task, 1)
+        assert api._token == new_token
+        mock_session.request.assert_not_called()
+
+    async def test_close_cancels_renewal(self, api):
+        """Closing the client should cancel the pending renewal timer."""
+        assert api.restore_token("token", time.time() + 3600)
+        handle = api._renew_handle
+        api.close()
+        assert handle.cancelled()
+        assert api._renew_handle is None
+
+
 class TestRequestWithRetry:
-    """Tests for _request_with_retry."""
+    """Tests for _request retries and re-authentication."""
 
     async def test_successful_request(self, api, mock_session):
         """Successful request returns parsed JSON."""
         api._token = "valid-token"
         mock_session.request.return_value = _make_response({"data": "value"})
-        result = await api._request_with_retry("GET", "https://example.com/api")
+        result = await api._request("GET", "https://example.com/api")
         assert result == {"data": "value"}
 
     async def test_401_triggers_reauth(self, api, mock_session):
@@ -96,56 +242,297 @@ class TestRequestWithRetry:
         mock_session.request.side_effect = [fail_response, success_response]
         mock_session.post.return_value = login_response
 
-        result = await api._request_with_retry("GET", "https://example.com/api")
+        result = await api._request("GET", "https://example.com/api")
         assert result == {"data": "value"}
         assert api._token == "new-token"
 
     async def test_transient_error_retries(self, api, mock_session):
-        """ConnectionError should retry once after 2s backoff."""
+        """ConnectionError should be retried after a backoff."""
         api._token = "valid-token"
         success_response = _make_response({"data": "ok"})
         mock_session.request.side_effect = [
             aiohttp.ClientConnectionError("connection lost"),
             success_response,
         ]
-        result = await api._request_with_retry("GET", "https://example.com/api")
+        result = await api._request("GET", "https://example.com/api")
         assert result == {"data": "ok"}
         assert mock_session.request.call_count == 2
 
     async def test_transient_error_retry_fails(self, api, mock_session):
-        """If retry also fails with transient error, exception propagates."""
+        """If every retry also fails with transient error, exception propagates."""
         api._token = "valid-token"
         mock_session.request.side_effect = aiohttp.ClientConnectionError("still broken")
         with pytest.raises(aiohttp.ClientConnectionError):
-            await api._request_with_retry("GET", "https://example.com/api")
+            await api._request("GET", "https://example.com/api")
+        assert mock_session.request.call_count == 3
+
+    def test_backoff_delay_grows_and_is_capped(self, mock_session):
+        """Backoff cap should double per attempt up to backoff_max."""
+        api = KlereoApi("u", "h", mock_session, backoff_base=1.0, backoff_max=5.0)
+        for attempt, cap in ((0, 1.0), (1, 2.0), (2, 4.0), (5, 5.0)):
+            delays = [api._backoff_delay(attempt) for _ in range(50)]
+            assert all(0 <= d <= cap for d in delays)
 
     async def test_non_401_http_error_propagates(self, api, mock_session):
         """Non-401 HTTP errors should propagate without retry."""
         api._token = "valid-token"
         mock_session.request.return_value = _make_response({}, status=500)
         with pytest.raises(aiohttp.ClientResponseError):
-            await api._request_with_retry("GET", "https://example.com/api")
+            await api._request("GET", "https://example.com/api")
 
 
-class TestParseResponse:
-    """Tests for _parse_response."""
+class TestCircuitBreaker:
+    """Tests for the per-endpoint circuit breaker."""
 
-    async def test_valid_json(self, api):
-        """Valid JSON response should be parsed."""
-        response = _make_response({"key": "value"})
-        result = await api._parse_response(response, "https://example.com")
-        assert result == {"key": "value"}
+    def test_opens_at_threshold(self):
+        """Breaker should open after the configured consecutive failures."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_CLOSED
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+        with pytest.raises(KlereoCircuitOpenError) as exc_info:
+            breaker.before_call("url")
+        assert 0 < exc_info.value.retry_after <= 60
+
+    def test_half_open_single_probe(self):
+        """After the timeout exactly one probe is admitted."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.before_call("url") is True
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        with pytest.raises(KlereoCircuitOpenError):
+            breaker.before_call("url")
+
+    def test_probe_success_closes(self):
+        """A successful probe should close the circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call("url")
+        breaker.record_success()
+        assert breaker.state == CIRCUIT_CLOSED
+        assert breaker.failures == 0
+
+    def test_probe_failure_reopens_with_longer_timeout(self):
+        """A failed probe should re-open with a doubled reset timeout."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        breaker.opened_at -= 10
+        breaker.before_call("url")
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+        assert breaker.reset_timeout == 20
+
+    async def test_api_fails_fast_when_open(self, mock_session):
+        """Once open, requests to the endpoint must not reach the network."""
+        api = KlereoApi("u", "h", mock_session, retry_attempts=0, circuit_threshold=2)
+        api._token = "valid-token"
+        mock_session.request.side_effect = aiohttp.ClientConnectionError("down")
+        for _ in range(2):
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await api.get_systems()
+        with pytest.raises(KlereoCircuitOpenError):
+            await api.get_systems()
+        assert mock_session.request.call_count == 2
+        assert api.circuit_breaker_states()[API_URL_GET_INDEX]["state"] == CIRCUIT_OPEN
+
+    async def test_breakers_are_per_endpoint(self, mock_session):
+        """An open circuit on one endpoint should not block another."""
+        api = KlereoApi("u", "h", mock_session, retry_attempts=0, circuit_threshold=1)
+        api._token = "valid-token"
+        mock_session.request.side_effect = aiohttp.ClientConnectionError("down")
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await api.get_systems()
+        mock_session.request.side_effect = None
+        mock_session.request.return_value = _make_response({"response": []})
+        assert await api.get_pool_details_raw("SYS1") == b'{"response": []}'
+
+    async def test_breakers_are_per_pool(self, mock_session):
+        """A failing pool should not open the circuit for the other pools."""
+        api = KlereoApi("u", "h", mock_session, retry_attempts=0, circuit_threshold=1)
+        api._token = "valid-token"
+        mock_session.request.side_effect = aiohttp.ClientConnectionError("down")
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await api.get_pool_details_raw("SYS1")
+        with pytest.raises(KlereoCircuitOpenError):
+            await api.get_pool_details_raw("SYS1")
+        mock_session.request.side_effect = None
+        mock_session.request.return_value = _make_response({"response": []})
+        assert await api.get_pool_details_raw("SYS2") == b'{"response": []}'
+        assert api.circuit_breaker_states()[f"{API_URL_GET_POOL_DETAILS}?poolID=SYS1"]["state"] == CIRCUIT_OPEN
+
+    async def test_server_errors_count_as_failures(self, mock_session):
+        """5xx responses should count towards opening the circuit."""
+        api = KlereoApi("u", "h", mock_session, circuit_threshold=1)
+        api._token = "valid-token"
+        mock_session.request.return_value = _make_response({}, status=503)
+        with pytest.raises(aiohttp.ClientResponseError):
+            await api.get_systems()
+        assert api.circuit_breakers[API_URL_GET_INDEX].state == CIRCUIT_OPEN
 
-    async def test_invalid_json_raises(self, api):
+
+class TestRateLimiter:
+    """Tests for the shared token-bucket rate limiter."""
+
+    async def test_burst_is_immediate(self):
+        """Requests within the burst should not wait."""
+        limiter = RateLimiter(rate=1, burst=3)
+        for _ in range(3):
+            await asyncio.wait_for(limiter.acquire(), 0.05)
+
+    async def test_waits_when_bucket_empty(self):
+        """Requests beyond the burst should wait for a refill."""
+        limiter = RateLimiter(rate=1000, burst=1)
+        await limiter.acquire()
+        await asyncio.wait_for(limiter.acquire(), 1)
+
+    async def test_priority_served_before_queued_reads(self):
+        """A command should overtake reads already waiting for tokens."""
+        # Slow enough that a GC pause cannot refill the bucket before the
+        # command is queued.
+        limiter = RateLimiter(rate=10, burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def _take(name, priority):
+            await limiter.acquire(priority=priority)
+            order.append(name)
+
+        reads = [asyncio.create_task(_take(f"read{i}", False)) for i in range(2)]
+        await asyncio.sleep(0)
+        command = asyncio.create_task(_take("command", True))
+        await asyncio.gather(*reads, command)
+        assert order[0] == "command"
+
+    async def test_cancelled_waiter_is_skipped(self):
+        """A cancelled waiter should not consume a token."""
+        limiter = RateLimiter(rate=100, burst=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.wait_for(limiter.acquire(), 1)
+
+    def test_shared_per_host(self):
+        """Limiters are keyed by host and shared across clients."""
+        assert get_rate_limiter(API_URL_GET_INDEX) is get_rate_limiter(API_URL_GET_POOL_DETAILS)
+        assert get_rate_limiter(API_URL_GET_INDEX) is not get_rate_limiter("https://example.com/api")
+
+    async def test_commands_acquire_with_priority(self, api, mock_session):
+        """set_output should request a priority token, reads a normal one."""
+        api._token = "valid-token"
+        mock_session.request.return_value = _make_response({"response": "ok"})
+        limiter = get_rate_limiter(API_URL_GET_INDEX)
+        limiter.acquire = AsyncMock()
+        await api.set_output("SYS1", 0, 0, 1)
+        await api.get_systems()
+        assert [c.kwargs["priority"] for c in limiter.acquire.call_args_list] == [True, False]
+
+
+class TestSingleFlight:
+    """Tests for coalescing of identical in-flight reads."""
+
+    @staticmethod
+    def _slow_request(mock_session, data):
+        """Make session.request yield to the loop before returning."""
+        async def _request(*args, **kwargs):
+            await asyncio.sleep(0)
+            return _make_response(data)
+        mock_session.request.side_effect = _request
+
+    async def test_identical_reads_share_one_request(self, api, mock_session):
+        """Concurrent identical reads should hit the network once."""
+        api._token = "valid-token"
+        self._slow_request(mock_session, {"response": []})
+        first, second = await asyncio.gather(
+            api.get_pool_details_raw("SYS1"), api.get_pool_details_raw("SYS1")
+        )
+        assert first == second == b'{"response": []}'
+        assert mock_session.request.call_count == 1
+        assert api._inflight == {}
+
+    async def test_raw_details_returned_undecoded(self, api, mock_session):
+        """get_pool_details_raw should return the body bytes."""
+        api._token = "valid-token"
+        mock_session.request.return_value = _make_response({"response": []})
+        assert await api.get_pool_details_raw("SYS1") == b'{"response": []}'
+
+    async def test_joined_callers_get_independent_objects(self, api, mock_session):
+        """Callers sharing a request should not share a mutable result."""
+        api._token = "valid-token"
+        self._slow_request(mock_session, {"response": []})
+        first, second = await asyncio.gather(api.get_systems(), api.get_systems())
+        assert first == second
+        assert first is not second
+        assert mock_session.request.call_count == 1
+
+    async def test_different_form_data_not_shared(self, api, mock_session):
+        """Reads for different pools are separate requests."""
+        api._token = "valid-token"
+        self._slow_request(mock_session, {"response": []})
+        await asyncio.gather(api.get_pool_details_raw("SYS1"), api.get_pool_details_raw("SYS2"))
+        assert mock_session.request.call_count == 2
+        urls = {c.args[1] for c in mock_session.request.call_args_list}
+        assert urls == {API_URL_GET_POOL_DETAILS}
+
+    async def test_writes_never_coalesced(self, api, mock_session):
+        """Identical concurrent writes must each reach the API."""
+        api._token = "valid-token"
+        self._slow_request(mock_session, {"response": "ok"})
+        await asyncio.gather(api.set_output("SYS1", 0, 0, 1), api.set_output("SYS1", 0, 0, 1))
+        assert mock_session.request.call_count == 2
+
+    async def test_shared_failure_propagates_to_all(self, api, mock_session):
+        """Every joined caller should see the shared request's error."""
+        api._token = "valid-token"
+
+        async def _request(*args, **kwargs):
+            await asyncio.sleep(0)
+            return _make_response({}, status=500)
+        mock_session.request.side_effect = _request
+        results = await asyncio.gather(
+            api.get_systems(), api.get_systems(), return_exceptions=True
+        )
+        assert all(isinstance(r, aiohttp.ClientResponseError) for r in results)
+        assert mock_session.request.call_count == 1
+
+
+class TestDecodeBody:
+    """Tests for decode_body and response validation."""
+
+    def test_valid_json(self):
+        """Valid JSON bodies should be parsed."""
+        assert decode_body(b'{"key": "value"}', "https://example.com") == {"key": "value"}
+
+    def test_invalid_json_raises(self):
         """Invalid JSON should raise KlereoApiError."""
-        response = AsyncMock()
-        response.raise_for_status = MagicMock()
-        response.text = AsyncMock(return_value="not json at all")
         with pytest.raises(KlereoApiError, match="Invalid JSON"):
-            await api._parse_response(response, "https://example.com")
+            decode_body(b"not json at all", "https://example.com")
+
+    def test_invalid_utf8_raises(self):
+        """Undecodable bytes should raise KlereoApiError, not UnicodeDecodeError."""
+        with pytest.raises(KlereoApiError, match="Invalid JSON"):
+            decode_body(b"\xff\xfe{", "https://example.com")
+
+    def test_stdlib_fallback_without_orjson(self, monkeypatch):
+        """Decoding should fall back to stdlib json when orjson is missing."""
+        monkeypatch.setattr(api_module, "orjson", None)
+        assert decode_body(b'{"key": "value"}', "https://example.com") == {"key": "value"}
+        with pytest.raises(KlereoApiError, match="Invalid JSON"):
+            decode_body(b"not json", "https://example.com")
 
-    async def test_http_error_raises(self, api):
+    async def test_invalid_json_from_api_raises(self, api, mock_session):
+        """A malformed body from the API should surface as KlereoApiError."""
+        api._token = "valid-token"
+        response = _make_response({})
+        response.read = AsyncMock(return_value=b"not json at all")
+        mock_session.request.return_value = response
+        with pytest.raises(KlereoApiError, match="Invalid JSON"):
+            await api.get_systems()
+
+    async def test_http_error_raises(self, api, mock_session):
         """Non-200 status should raise ClientResponseError via raise_for_status."""
-        response = _make_response({}, status=503)
+        api._token = "valid-token"
+        mock_session.request.return_value = _make_response({}, status=404)
         with pytest.raises(aiohttp.ClientResponseError):
-            await api._parse_response(response, "https://example.com")
+            await api.get_systems()
@@ -28,8 +28,6 @@ def mock_coordinator():
         "SYS1": KlereoSystemData(
             info=KlereoSystemInfo(id_system="SYS1", pool_nickname="My Pool"),
             details=KlereoPoolDetails(
-                probes=[probe],
-                outs=[],
                 regul_modes={},
                 probe_index={0: probe},
                 output_index={},
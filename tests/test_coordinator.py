@@ -1,18 +1,38 @@
-"""Tests for the Klereo coordinator."""
-from unittest.mock import AsyncMock, MagicMock
+"""Tests for the Klereo coordinators."""
+import asyncio
+import gc
+import json
+import secrets
+import tracemalloc
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import UpdateFailed
 
-from custom_components.klereo.api import KlereoApi
-from custom_components.klereo.coordinator import KlereoCoordinator
-from custom_components.klereo.models import KlereoSystemData
+from custom_components.klereo.api import KlereoApi, KlereoApiError, KlereoCircuitOpenError
+from custom_components.klereo.const import POLL_MODE_CHANGES
+from custom_components.klereo.coordinator import KlereoCoordinator, _confirm_delays
+from custom_components.klereo.models import (
+    COMMAND_OUTPUT,
+    KlereoCommand,
+    KlereoSystemData,
+    KlereoTopology,
+)
+
+
+def _raw(data) -> bytes:
+    """Encode a GetPoolDetails response as the raw API body."""
+    return json.dumps(data).encode()
 
 
 @pytest.fixture
-def mock_hass():
-    """Create a mock HomeAssistant instance."""
+async def mock_hass():
+    """Create a mock HomeAssistant instance bound to the running loop."""
     hass = MagicMock()
-    hass.loop = None
+    hass.loop = asyncio.get_running_loop()
+    hass.is_stopping = False
     return hass
 
 
@@ -21,36 +41,38 @@ def mock_api():
     """Create a mock API."""
     api = AsyncMock(spec=KlereoApi)
     api.login.return_value = None
+    api.get_systems.return_value = {"response": [{"idSystem": "SYS1"}]}
+    api.get_pool_details_raw.return_value = _raw({"response": [{}]})
     return api
 
 
 @pytest.fixture
-def coordinator(mock_hass, mock_api):
-    """Create a coordinator with mock dependencies."""
-    coord = KlereoCoordinator.__new__(KlereoCoordinator)
-    coord.api = mock_api
-    coord.hass = mock_hass
-    coord.logger = MagicMock()
-    coord.name = "klereo"
-    coord.update_interval = None
-    coord._listeners = {}
+async def coordinator(mock_hass, mock_api):
+    """Create an account coordinator with mock dependencies."""
+    coord = KlereoCoordinator(mock_hass, mock_api, scan_interval=5)
     coord.data = {}
-    coord.last_update_success = True
-    return coord
+    yield coord
+    await coord.async_shutdown()
+
+
+async def _refresh(coordinator):
+    """Run an account update and store its result like the coordinator does."""
+    coordinator.data = await coordinator._async_update_data()
+    return coordinator.data
 
 
 class TestAsyncUpdateData:
-    """Tests for _async_update_data."""
+    """Tests for the account-level update."""
 
     async def test_parses_response_format(self, coordinator, mock_api):
         """Should parse {response: [...]} format."""
         mock_api.get_systems.return_value = {
             "response": [{"idSystem": "SYS1", "poolNickname": "Pool"}]
         }
-        mock_api.get_pool_details.return_value = {
+        mock_api.get_pool_details_raw.return_value = _raw({
             "response": [{"probes": [{"index": 0, "type": 5}], "outs": []}]
-        }
-        result = await coordinator._async_update_data()
+        })
+        result = await _refresh(coordinator)
         assert "SYS1" in result
         assert isinstance(result["SYS1"], KlereoSystemData)
         assert result["SYS1"].info.id_system == "SYS1"
@@ -60,8 +82,7 @@ class TestAsyncUpdateData:
         mock_api.get_systems.return_value = [
             {"idSystem": "SYS1"}
         ]
-        mock_api.get_pool_details.return_value = {"response": [{}]}
-        result = await coordinator._async_update_data()
+        result = await _refresh(coordinator)
         assert "SYS1" in result
         assert isinstance(result["SYS1"], KlereoSystemData)
 
@@ -70,22 +91,18 @@ class TestAsyncUpdateData:
         mock_api.get_systems.return_value = {
             "list_systems": [{"idSystem": "SYS1"}]
         }
-        mock_api.get_pool_details.return_value = {"response": [{}]}
-        result = await coordinator._async_update_data()
+        result = await _refresh(coordinator)
         assert "SYS1" in result
 
     async def test_builds_probe_index(self, coordinator, mock_api):
         """Should build probe_index for O(1) lookup."""
-        mock_api.get_systems.return_value = {
-            "response": [{"idSystem": "SYS1"}]
-        }
-        mock_api.get_pool_details.return_value = {
+        mock_api.get_pool_details_raw.return_value = _raw({
             "response": [{"probes": [
                 {"index": 0, "type": 5, "filteredValue": 28.5},
                 {"index": 1, "type": 3, "filteredValue": 7.2},
             ], "outs": []}]
-        }
-        result = await coordinator._async_update_data()
+        })
+        result = await _refresh(coordinator)
         probe_idx = result["SYS1"].details.probe_index
         assert 0 in probe_idx
         assert 1 in probe_idx
@@ -93,15 +110,12 @@ class TestAsyncUpdateData:
 
     async def test_builds_output_index(self, coordinator, mock_api):
         """Should build output_index for O(1) lookup."""
-        mock_api.get_systems.return_value = {
-            "response": [{"idSystem": "SYS1"}]
-        }
-        mock_api.get_pool_details.return_value = {
+        mock_api.get_pool_details_raw.return_value = _raw({
             "response": [{"probes": [], "outs": [
                 {"index": 0, "status": 1},
             ]}]
-        }
-        result = await coordinator._async_update_data()
+        })
+        result = await _refresh(coordinator)
         out_idx = result["SYS1"].details.output_index
         assert 0 in out_idx
         assert out_idx[0].status == 1
@@ -111,21 +125,707 @@ class TestAsyncUpdateData:
         mock_api.get_systems.return_value = {
             "response": [{"poolNickname": "No ID"}]
         }
-        result = await coordinator._async_update_data()
+        result = await _refresh(coordinator)
         assert len(result) == 0
+        assert coordinator.system_coordinators == {}
 
     async def test_partial_failure_continues(self, coordinator, mock_api):
-        """Should continue when one system's details fail."""
+        """A failing pool should not block the others."""
         mock_api.get_systems.return_value = {
             "response": [
                 {"idSystem": "SYS1"},
                 {"idSystem": "SYS2"},
             ]
         }
-        mock_api.get_pool_details.side_effect = [
-            Exception("API error"),
-            {"response": [{"probes": [], "outs": []}]},
+        mock_api.get_pool_details_raw.side_effect = [
+            KlereoCircuitOpenError("url", 30),
+            _raw({"response": [{"probes": [], "outs": []}]}),
         ]
-        result = await coordinator._async_update_data()
-        assert "SYS1" in result  # still present, just without merged details
+        result = await _refresh(coordinator)
+        assert "SYS1" not in result  # no data until its first successful poll
         assert "SYS2" in result
+        assert coordinator.system_coordinators["SYS1"].last_update_success is False
+        assert coordinator.system_coordinators["SYS2"].last_update_success is True
+
+
+class TestSystemCoordinators:
+    """Tests for the per-pool coordinators."""
+
+    async def test_one_coordinator_per_system(self, coordinator, mock_api):
+        """Each listed pool should get its own coordinator."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1"}, {"idSystem": "SYS2"}]
+        }
+        await _refresh(coordinator)
+        assert set(coordinator.system_coordinators) == {"SYS1", "SYS2"}
+        assert coordinator.system_coordinators["SYS1"].update_interval == timedelta(minutes=5)
+
+    async def test_removed_system_stops_updating(self, coordinator, mock_api):
+        """A pool that disappears from GetIndex should lose its coordinator."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1"}, {"idSystem": "SYS2"}]
+        }
+        await _refresh(coordinator)
+        mock_api.get_systems.return_value = {"response": [{"idSystem": "SYS1"}]}
+        result = await _refresh(coordinator)
+        assert list(coordinator.system_coordinators) == ["SYS1"]
+        assert list(result) == ["SYS1"]
+
+    async def test_removed_system_leaves_device_registry(self, coordinator, mock_api):
+        """A vanished pool's device should be detached from the config entry."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1"}, {"idSystem": "SYS2"}]
+        }
+        await _refresh(coordinator)
+        coordinator.config_entry = MagicMock(entry_id="entry")
+        registry = MagicMock()
+        mock_api.get_systems.return_value = {"response": [{"idSystem": "SYS1"}]}
+        with patch("custom_components.klereo.coordinator.dr.async_get", return_value=registry):
+            await _refresh(coordinator)
+        registry.async_get_device.assert_called_once_with(identifiers={("klereo", "SYS2")})
+        registry.async_update_device.assert_called_once_with(
+            registry.async_get_device.return_value.id, remove_config_entry_id="entry"
+        )
+        assert coordinator.topology_changes["SYS2"].removed == KlereoTopology()
+
+    async def test_topology_changes_track_vanished_hardware(self, coordinator, mock_api):
+        """Only pools whose probes, outputs or parameters changed are reported."""
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "probes": [{"index": 0, "type": 5}], "outs": [{"index": 0}, {"index": 1}],
+        }]})
+        coordinator.data = None
+        await _refresh(coordinator)
+        added = coordinator.topology_changes["SYS1"].added
+        assert added.outputs == {0, 1}
+        assert added.probes == {(0, 5)}
+
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "probes": [{"index": 0, "type": 5, "value": 7.2}], "outs": [{"index": 0}, {"index": 1}],
+        }]})
+        await coordinator.system_coordinators["SYS1"].async_refresh()
+        assert coordinator.topology_changes == {}
+
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "probes": [{"index": 0, "type": 5}], "outs": [{"index": 0}],
+        }]})
+        await coordinator.system_coordinators["SYS1"].async_refresh()
+        diff = coordinator.topology_changes["SYS1"]
+        assert diff.removed.outputs == {1}
+        assert not diff.added
+
+    async def test_account_refresh_does_not_refetch_details(self, coordinator, mock_api):
+        """In full mode, existing pools poll on their own schedule."""
+        await _refresh(coordinator)
+        await _refresh(coordinator)
+        assert mock_api.get_pool_details_raw.call_count == 1
+
+    async def test_pool_update_notifies_only_its_entities(self, coordinator, mock_api):
+        """A pool refresh should notify its own entities and discovery only."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1"}, {"idSystem": "SYS2"}]
+        }
+        await _refresh(coordinator)
+        sys1, sys2, discovery = MagicMock(), MagicMock(), MagicMock()
+        coordinator.async_add_listener(sys1, ("SYS1", "probe", 0))
+        coordinator.async_add_listener(sys2, ("SYS2", "probe", 0))
+        coordinator.async_add_listener(discovery)
+
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{"probes": [{"index": 0}]}]})
+        await coordinator.system_coordinators["SYS1"].async_refresh()
+        sys1.assert_called_once()
+        sys2.assert_not_called()
+        discovery.assert_called_once()
+        assert coordinator.data["SYS1"].details.probe_index
+
+    async def test_unchanged_pool_update_skips_discovery(self, coordinator, mock_api):
+        """No listener should run when a pool's data is reused."""
+        await _refresh(coordinator)
+        entity, discovery = MagicMock(), MagicMock()
+        coordinator.async_add_listener(entity, ("SYS1", "output", 0))
+        coordinator.async_add_listener(discovery)
+        await coordinator.system_coordinators["SYS1"].async_refresh()
+        entity.assert_not_called()
+        discovery.assert_not_called()
+
+    async def test_dispatch_follows_availability_and_status(self, coordinator, mock_api):
+        """Failures and command status changes should reach the affected entities."""
+        await _refresh(coordinator)
+        entity = MagicMock()
+        remove = coordinator.async_add_listener(entity, ("SYS1", "output", 0))
+        system_coordinator = coordinator.system_coordinators["SYS1"]
+        mock_api.get_pool_details_raw.side_effect = KlereoApiError("down")
+        await system_coordinator.async_refresh()
+        entity.assert_called_once()
+
+        system_coordinator.command_status["output_1"] = "pending"
+        coordinator._async_system_updated("SYS1")
+        entity.assert_called_once()
+        system_coordinator.command_status["output_0"] = "pending"
+        coordinator._async_system_updated("SYS1")
+        assert entity.call_count == 2
+
+        remove()
+        assert "SYS1" not in coordinator._subscribers
+
+    async def test_account_listeners_exclude_entities(self, coordinator):
+        """Account refreshes should only notify discovery listeners."""
+        entity, discovery = MagicMock(), MagicMock()
+        coordinator.async_add_listener(entity, ("SYS1", "output", 0))
+        coordinator.async_add_listener(discovery)
+        coordinator.async_update_listeners()
+        entity.assert_not_called()
+        discovery.assert_called_once()
+
+    async def test_refresh_systems_refreshes_every_pool(self, coordinator, mock_api):
+        """async_refresh_systems should re-read GetIndex and every pool."""
+        await _refresh(coordinator)
+        coordinator.async_refresh = AsyncMock()
+        await coordinator.async_refresh_systems()
+        coordinator.async_refresh.assert_called_once()
+        assert mock_api.get_pool_details_raw.call_count == 2
+
+    async def test_full_mode_intervals(self, mock_hass, mock_api):
+        """Full mode re-reads the pool list at the TTL, pools at the scan interval."""
+        coord = KlereoCoordinator(mock_hass, mock_api, scan_interval=3, system_list_ttl=90)
+        assert coord.update_interval == timedelta(minutes=90)
+        assert coord.system_update_interval == timedelta(minutes=3)
+
+
+class TestAdaptivePolling:
+    """Tests for the adaptive per-pool interval."""
+
+    async def test_disabled_by_default(self, coordinator):
+        """Pools should poll at the fixed interval unless enabled."""
+        await _refresh(coordinator)
+        assert coordinator.system_coordinators["SYS1"].scheduler is None
+
+    async def test_running_filtration_shortens_interval(self, mock_hass, mock_api):
+        """A pool with filtration running should poll at the minimum interval."""
+        coord = KlereoCoordinator(
+            mock_hass, mock_api, scan_interval=5, adaptive_polling=True,
+            min_scan_interval=2, max_scan_interval=20,
+        )
+        coord.data = {}
+        await _refresh(coord)
+        system_coordinator = coord.system_coordinators["SYS1"]
+        assert system_coordinator.update_interval == timedelta(minutes=5)
+
+        mock_api.get_pool_details_raw.return_value = _raw(
+            {"response": [{"outs": [{"index": 1, "status": 1}]}]}
+        )
+        await system_coordinator.async_refresh()
+        assert system_coordinator.update_interval == timedelta(minutes=2)
+        await coord.async_shutdown()
+
+    async def test_not_used_in_changes_mode(self, mock_hass, mock_api):
+        """Changes mode keeps its own staleness schedule."""
+        coord = KlereoCoordinator(
+            mock_hass, mock_api, poll_mode=POLL_MODE_CHANGES, adaptive_polling=True
+        )
+        assert coord.create_scheduler() is None
+
+
+    async def test_align_polls_uses_learned_upload_time(self, mock_hass, mock_api):
+        """With poll alignment, the next poll follows the cadence model."""
+        coord = KlereoCoordinator(mock_hass, mock_api, scan_interval=5, align_polls=True)
+        coord.data = {}
+        await _refresh(coord)
+        system_coordinator = coord.system_coordinators["SYS1"]
+        system_coordinator.cadence.next_delay = MagicMock(return_value=42.0)
+        await system_coordinator.async_refresh()
+        system_coordinator.cadence.next_delay.assert_called_once()
+        assert system_coordinator.cadence.next_delay.call_args.args[0] == 300
+        assert system_coordinator.update_interval == timedelta(seconds=42)
+        await coord.async_shutdown()
+
+    async def test_cadence_learned_without_alignment(self, coordinator, mock_api):
+        """Content changes should feed the cadence model even when not aligning."""
+        await _refresh(coordinator)
+        system_coordinator = coordinator.system_coordinators["SYS1"]
+        system_coordinator.cadence.observe = MagicMock()
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{"probes": [{"index": 0}]}]})
+        await system_coordinator.async_refresh()
+        await system_coordinator.async_refresh()
+        changed = [call.args[0] for call in system_coordinator.cadence.observe.call_args_list]
+        assert changed == [True, False]
+        assert system_coordinator.update_interval == timedelta(minutes=5)
+
+
+class TestPayloadRetention:
+    """Tests that raw API payloads are only kept on request."""
+
+    JUNK = 400_000
+
+    async def _retained(self, coordinator, mock_api):
+        """Return the memory still allocated after two polls of a bulky pool."""
+        mock_api.get_systems.side_effect = lambda: {
+            "response": [{"idSystem": "SYS1", "junk": secrets.token_hex(self.JUNK // 2)}]
+        }
+        mock_api.get_pool_details_raw.return_value = _raw(
+            {"response": [{"junk": secrets.token_hex(self.JUNK // 2)}]}
+        )
+        gc.collect()
+        tracemalloc.start()
+        try:
+            await _refresh(coordinator)
+            await _refresh(coordinator)
+            gc.collect()
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return retained
+
+    async def test_raw_payloads_not_retained(self, coordinator, mock_api):
+        """Only the fields the integration reads should stay in memory."""
+        retained = await self._retained(coordinator, mock_api)
+        assert coordinator.system_coordinators["SYS1"].raw_details is None
+        assert coordinator.system_map == {"SYS1": {"idSystem": "SYS1"}}
+        assert coordinator.raw_index == {}
+        assert retained < self.JUNK / 10
+
+    async def test_raw_payloads_retained_on_request(self, coordinator, mock_api):
+        """With keep_raw_payloads, both raw responses are kept for diagnostics."""
+        coordinator.keep_raw_payloads = True
+        retained = await self._retained(coordinator, mock_api)
+        assert set(coordinator.raw_index["SYS1"]) == {"idSystem", "junk"}
+        raw_details = coordinator.system_coordinators["SYS1"].raw_details
+        assert set(raw_details["response"][0]) == {"junk"}
+        assert retained > 2 * self.JUNK
+
+    async def test_models_are_slotted(self, coordinator):
+        """Parsed models should not carry a per-instance __dict__."""
+        data = (await _refresh(coordinator))["SYS1"]
+        for model in (data, data.info, data.details):
+            assert not hasattr(model, "__dict__")
+
+
+class TestUnchangedDetails:
+    """Tests for the content-hash short-circuit."""
+
+    @pytest.fixture(autouse=True)
+    def _responses(self, mock_api):
+        mock_api.get_pool_details_raw.return_value = _raw(
+            {"response": [{"probes": [{"index": 0, "type": 5, "filteredValue": 28.5}]}]}
+        )
+
+    async def test_reuses_system_data_when_unchanged(self, coordinator):
+        """An identical payload should yield the very same KlereoSystemData."""
+        first = (await _refresh(coordinator))["SYS1"]
+        await coordinator.system_coordinators["SYS1"].async_refresh()
+        assert coordinator.system_coordinators["SYS1"].data is first
+
+    async def test_rebuilds_when_payload_changes(self, coordinator, mock_api):
+        """A different payload should produce fresh system data."""
+        first = (await _refresh(coordinator))["SYS1"]
+        mock_api.get_pool_details_raw.return_value = _raw(
+            {"response": [{"probes": [{"index": 0, "type": 5, "filteredValue": 29.0}]}]}
+        )
+        system_coordinator = coordinator.system_coordinators["SYS1"]
+        await system_coordinator.async_refresh()
+        assert system_coordinator.data is not first
+        assert system_coordinator.data.details.probe_index[0].filtered_value == 29.0
+
+    async def test_info_change_published_without_details_fetch(self, coordinator, mock_api):
+        """A renamed pool should be published without refetching details."""
+        await _refresh(coordinator)
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1", "poolNickname": "Renamed"}]
+        }
+        result = await _refresh(coordinator)
+        assert result["SYS1"].info.pool_nickname == "Renamed"
+        assert mock_api.get_pool_details_raw.call_count == 1
+
+    async def test_invalid_json_fails_the_pool(self, coordinator, mock_api):
+        """A malformed body should fail only that pool's update."""
+        mock_api.get_pool_details_raw.return_value = b"<html>"
+        result = await _refresh(coordinator)
+        assert "SYS1" not in result
+        assert coordinator.system_coordinators["SYS1"].last_update_success is False
+
+
+class TestChangesPollMode:
+    """Tests for the two-tier (GetIndex change probe) polling mode."""
+
+    @pytest.fixture
+    async def changes_coordinator(self, mock_hass, mock_api):
+        """Create a coordinator in changes poll mode."""
+        coord = KlereoCoordinator(
+            mock_hass, mock_api, scan_interval=5, poll_mode=POLL_MODE_CHANGES, max_staleness=30
+        )
+        coord.data = {}
+        yield coord
+        await coord.async_shutdown()
+
+    async def test_intervals(self, changes_coordinator):
+        """GetIndex is polled at the scan interval, details at max staleness."""
+        assert changes_coordinator.update_interval == timedelta(minutes=5)
+        assert changes_coordinator.system_update_interval == timedelta(minutes=30)
+
+    async def test_skips_details_when_index_unchanged(self, changes_coordinator, mock_api):
+        """Pools whose freshness field did not move should not be re-fetched."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1", "lastUpdate": "2026-01-01 10:00"}]
+        }
+        await _refresh(changes_coordinator)
+        await _refresh(changes_coordinator)
+        assert mock_api.get_pool_details_raw.call_count == 1
+
+    async def test_fetches_when_index_moves(self, changes_coordinator, mock_api):
+        """A moved freshness field should trigger a details fetch."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1", "lastUpdate": "2026-01-01 10:00"}]
+        }
+        await _refresh(changes_coordinator)
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1", "lastUpdate": "2026-01-01 10:05"}]
+        }
+        await _refresh(changes_coordinator)
+        assert mock_api.get_pool_details_raw.call_count == 2
+
+    async def test_always_fetches_without_freshness_fields(self, changes_coordinator, mock_api):
+        """Pools without freshness fields fall back to full polling."""
+        await _refresh(changes_coordinator)
+        await _refresh(changes_coordinator)
+        assert mock_api.get_pool_details_raw.call_count == 2
+
+    async def test_failed_pool_retried_on_next_probe(self, changes_coordinator, mock_api):
+        """A pool whose last poll failed should be retried even if unchanged."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1", "lastUpdate": "a"}]
+        }
+        mock_api.get_pool_details_raw.side_effect = [KlereoCircuitOpenError("url", 1), _raw({})]
+        await _refresh(changes_coordinator)
+        await _refresh(changes_coordinator)
+        assert mock_api.get_pool_details_raw.call_count == 2
+
+    async def test_only_moved_pools_fetched(self, changes_coordinator, mock_api):
+        """Only pools with a moved freshness field are fetched, order preserved."""
+        mock_api.get_systems.return_value = {"response": [
+            {"idSystem": "SYS1", "lastUpdate": "a"},
+            {"idSystem": "SYS2", "lastUpdate": "a"},
+        ]}
+        await _refresh(changes_coordinator)
+        mock_api.get_pool_details_raw.reset_mock()
+        mock_api.get_systems.return_value = {"response": [
+            {"idSystem": "SYS1", "lastUpdate": "a"},
+            {"idSystem": "SYS2", "lastUpdate": "b"},
+        ]}
+        result = await _refresh(changes_coordinator)
+        mock_api.get_pool_details_raw.assert_called_once_with("SYS2")
+        assert list(result) == ["SYS1", "SYS2"]
+
+
+class TestCircuitOpenBackoff:
+    """Tests for interval stretching while the API circuit is open."""
+
+    @pytest.fixture
+    async def system_coordinator(self, coordinator):
+        """Return the coordinator of an already discovered pool."""
+        await _refresh(coordinator)
+        return coordinator.system_coordinators["SYS1"]
+
+    async def test_stretches_interval_when_circuit_open(self, system_coordinator, mock_api):
+        """A fast-failing call should double the pool's update interval."""
+        mock_api.get_pool_details_raw.side_effect = KlereoCircuitOpenError("url", 30)
+        with pytest.raises(UpdateFailed):
+            await system_coordinator._async_update_data()
+        assert system_coordinator.update_interval == timedelta(minutes=10)
+        with pytest.raises(UpdateFailed):
+            await system_coordinator._async_update_data()
+        assert system_coordinator.update_interval == timedelta(minutes=20)
+
+    async def test_stretch_is_capped(self, system_coordinator, mock_api):
+        """The stretched interval should not exceed the maximum."""
+        system_coordinator.update_interval = timedelta(minutes=50)
+        mock_api.get_pool_details_raw.side_effect = KlereoCircuitOpenError("url", 30)
+        with pytest.raises(UpdateFailed):
+            await system_coordinator._async_update_data()
+        assert system_coordinator.update_interval == timedelta(minutes=60)
+
+    async def test_success_restores_interval(self, system_coordinator):
+        """A successful update should restore the configured interval."""
+        system_coordinator.update_interval = timedelta(minutes=40)
+        await system_coordinator._async_update_data()
+        assert system_coordinator.update_interval == timedelta(minutes=5)
+
+    async def test_account_update_fails_when_index_circuit_open(self, coordinator, mock_api):
+        """An open GetIndex circuit should fail the account update."""
+        mock_api.get_systems.side_effect = KlereoCircuitOpenError("url", 30)
+        with pytest.raises(UpdateFailed):
+            await coordinator._async_update_data()
+
+
+class TestCommands:
+    """Tests for command write-through and confirmation."""
+
+    @pytest.fixture
+    async def confirmations(self, coordinator, mock_hass, mock_api, monkeypatch):
+        """Discover two pools and capture confirmation loops without sleeping."""
+        mock_api.get_systems.return_value = {
+            "response": [{"idSystem": "SYS1"}, {"idSystem": "SYS2"}]
+        }
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "outs": [{"index": 0, "status": 0, "mode": 1}],
+            "RegulModes": {"ConsigneEau": 27.0},
+        }]})
+        await _refresh(coordinator)
+        mock_api.get_pool_details_raw.reset_mock()
+
+        loops = []
+
+        def _create_task(target, name):
+            # Run command queues; capture confirmation loops for the test to await.
+            if name.endswith("_commands"):
+                return asyncio.ensure_future(target)
+            loops.append(target)
+            return MagicMock()
+
+        mock_hass.async_create_background_task.side_effect = _create_task
+        monkeypatch.setattr(
+            "custom_components.klereo.coordinator.asyncio.sleep", AsyncMock()
+        )
+        yield loops
+        for loop in loops:
+            loop.close()
+
+    def _cloud_reports(self, mock_api, status):
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "outs": [{"index": 0, "status": status, "mode": 0}],
+            "RegulModes": {"ConsigneEau": 27.0},
+        }]})
+
+    async def test_set_output_publishes_expected_state(self, coordinator, mock_api, confirmations):
+        """The commanded output state should be published without a fetch."""
+        listener = MagicMock()
+        coordinator.async_add_listener(listener, ("SYS1", "output", 0))
+        await coordinator.async_set_output("SYS1", 0, 0, 1)
+        mock_api.set_output.assert_called_once_with("SYS1", 0, 0, 1)
+        output = coordinator.data["SYS1"].details.output_index[0]
+        assert (output.mode, output.status) == (0, 1)
+        assert coordinator.system_coordinators["SYS1"].command_status == {"output_0": "pending"}
+        listener.assert_called_once()
+        mock_api.get_pool_details_raw.assert_not_called()
+        mock_api.get_systems.assert_called_once()
+
+    async def test_set_param_publishes_expected_value(self, coordinator, confirmations):
+        """The commanded parameter should be published without a fetch."""
+        await coordinator.async_set_param("SYS1", "ConsigneEau", 28.5)
+        assert coordinator.data["SYS1"].details.regul_modes["ConsigneEau"] == 28.5
+
+    async def test_confirms_with_single_pool_fetch(self, coordinator, mock_api, confirmations):
+        """A matching fetch should confirm the command and stop polling."""
+        await coordinator.async_set_output("SYS1", 0, 0, 1)
+        self._cloud_reports(mock_api, 1)
+        await confirmations[-1]
+        mock_api.get_pool_details_raw.assert_called_once_with("SYS1")
+        assert coordinator.system_coordinators["SYS1"].command_status == {"output_0": "confirmed"}
+
+    async def test_non_manual_mode_confirmed_by_mode(self, coordinator, mock_api, confirmations):
+        """Outside manual mode, the status reported by the cloud is accepted."""
+        # Output 0 is off; selecting Regulation sends its current status along.
+        await coordinator.async_set_output("SYS1", 0, 3, 0)
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "outs": [{"index": 0, "status": 1, "mode": 3}],
+        }]})
+        await confirmations[-1]
+        mock_api.get_pool_details_raw.assert_called_once_with("SYS1")
+        output = coordinator.data["SYS1"].details.output_index[0]
+        assert (output.mode, output.status) == (3, 1)
+        assert coordinator.system_coordinators["SYS1"].command_status == {"output_0": "confirmed"}
+
+    async def test_non_manual_mode_keeps_reported_status(self, coordinator, confirmations):
+        """A pending non-manual mode change should not pin the output's status."""
+        await coordinator.async_set_output("SYS1", 0, 3, 1)
+        output = coordinator.data["SYS1"].details.output_index[0]
+        assert (output.mode, output.status) == (3, 0)
+
+    async def test_holds_expected_state_until_deadline(self, coordinator, mock_api, confirmations):
+        """Stale fetches should not revert the state before the deadline."""
+        await coordinator.async_set_output("SYS1", 0, 0, 1)
+        self._cloud_reports(mock_api, 0)
+
+        system_coordinator = coordinator.system_coordinators["SYS1"]
+        states = []
+        coordinator.async_add_listener(
+            lambda: states.append(coordinator.data["SYS1"].details.output_index[0].status),
+            ("SYS1", "output", 0),
+        )
+        await confirmations[-1]
+        # 30 + 60 + 120 + 90 s of backoff, then one fetch to show the cloud state;
+        # the held output only changes (and notifies) on that last fetch.
+        assert mock_api.get_pool_details_raw.call_count == 5
+        assert states == [0]
+        assert system_coordinator.command_status == {"output_0": "timed_out"}
+
+    async def test_confirmation_does_not_feed_cadence(self, coordinator, mock_api, confirmations):
+        """Command-driven fetches and changes should not become upload samples."""
+        system_coordinator = coordinator.system_coordinators["SYS1"]
+        observe = MagicMock(wraps=system_coordinator.cadence.observe)
+        system_coordinator.cadence.observe = observe
+        await coordinator.async_set_output("SYS1", 0, 0, 1)
+        self._cloud_reports(mock_api, 1)
+        await confirmations[-1]
+        observe.assert_not_called()
+        # The next scheduled poll sees the command's change: no bracket is opened.
+        await system_coordinator.async_refresh()
+        observe.assert_called_once()
+        assert system_coordinator.cadence.as_dict(0)["samples"] == 0
+
+    async def test_new_command_restarts_confirmation(self, coordinator, confirmations):
+        """A second command should cancel the running confirmation loop."""
+        await coordinator.async_set_output("SYS1", 0, 0, 1)
+        first = coordinator.system_coordinators["SYS1"]._confirm_task
+        await coordinator.async_set_param("SYS1", "ConsigneEau", 28.5)
+        first.cancel.assert_called_once()
+        assert len(confirmations) == 2
+
+    async def test_failed_command_leaves_data(self, coordinator, mock_api, confirmations):
+        """A failed command should raise and not patch anything."""
+        mock_api.set_output.side_effect = Exception("boom")
+        before = coordinator.data["SYS1"]
+        with pytest.raises(HomeAssistantError):
+            await coordinator.async_set_output("SYS1", 0, 0, 1)
+        assert coordinator.data["SYS1"] is before
+        assert confirmations == []
+
+
+class TestCommandQueue:
+    """Tests for the per-pool command queue."""
+
+    @pytest.fixture
+    async def gated(self, coordinator, mock_hass, mock_api, monkeypatch):
+        """Discover a pool and make the first SetOut call wait for a gate."""
+        mock_api.get_pool_details_raw.return_value = _raw({"response": [{
+            "outs": [{"index": 0, "status": 0, "mode": 0}, {"index": 1, "status": 0, "mode": 0}],
+        }]})
+        await _refresh(coordinator)
+
+        confirmations = []
+
+        def _create_task(target, name):
+            if name.endswith("_commands"):
+                return asyncio.ensure_future(target)
+            confirmations.append(target)
+            return MagicMock()
+
+        mock_hass.async_create_background_task.side_effect = _create_task
+        gate = asyncio.Event()
+        sent = []
+
+        async def _set_output(system_id, index, mode, state):
+            sent.append((index, mode, state))
+            if len(sent) == 1:
+                await gate.wait()
+            if state == 9:
+                raise Exception("rejected")
+            return {"response": state}
+
+        mock_api.set_output.side_effect = _set_output
+        yield gate, sent, confirmations
+        gate.set()
+        for confirmation in confirmations:
+            confirmation.close()
+
+    async def test_collapses_to_last_value(self, coordinator, gated):
+        """Commands for the same output queued behind another collapse."""
+        gate, sent, _ = gated
+        first = asyncio.ensure_future(coordinator.async_set_output("SYS1", 0, 0, 1))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coordinator.async_set_output("SYS1", 1, 0, 1))
+        third = asyncio.ensure_future(coordinator.async_set_output("SYS1", 1, 0, 0))
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(first, second, third)
+        assert sent == [(0, 0, 1), (1, 0, 0)]
+        assert results == [{"response": 1}, {"response": 0}, {"response": 0}]
+        assert coordinator.data["SYS1"].details.output_index[1].status == 0
+
+    async def test_sends_serially(self, coordinator, gated):
+        """A command should not be sent while another is in flight."""
+        gate, sent, _ = gated
+        first = asyncio.ensure_future(coordinator.async_set_output("SYS1", 0, 0, 1))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coordinator.async_set_output("SYS1", 1, 0, 1))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert sent == [(0, 0, 1)]
+        gate.set()
+        await asyncio.gather(first, second)
+        assert sent == [(0, 0, 1), (1, 0, 1)]
+
+    async def test_failure_does_not_block_others(self, coordinator, gated):
+        """One rejected command should fail its caller only."""
+        gate, sent, _ = gated
+        first = asyncio.ensure_future(coordinator.async_set_output("SYS1", 0, 0, 1))
+        await asyncio.sleep(0)
+        failing = asyncio.ensure_future(coordinator.async_set_output("SYS1", 1, 0, 9))
+        await asyncio.sleep(0)
+        gate.set()
+        await first
+        with pytest.raises(HomeAssistantError):
+            await failing
+        ok = await coordinator.async_set_output("SYS1", 1, 0, 1)
+        assert ok == {"response": 1}
+
+    async def test_one_confirmation_after_drain(self, coordinator, gated):
+        """A burst of commands should start a single confirmation run."""
+        gate, _, confirmations = gated
+        first = asyncio.ensure_future(coordinator.async_set_output("SYS1", 0, 0, 1))
+        await asyncio.sleep(0)
+        others = [
+            asyncio.ensure_future(coordinator.async_set_output("SYS1", 1, 0, state))
+            for state in (1, 0, 1)
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *others)
+        assert len(confirmations) == 1
+
+    async def test_shutdown_releases_waiting_callers(self, coordinator, gated):
+        """Callers of in-flight and queued commands should not hang on unload."""
+        first = asyncio.ensure_future(coordinator.async_set_output("SYS1", 0, 0, 1))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(coordinator.async_set_output("SYS1", 1, 0, 1))
+        await asyncio.sleep(0)
+        await coordinator.system_coordinators["SYS1"].async_shutdown()
+        done, pending = await asyncio.wait([first, queued], timeout=1)
+        assert not pending
+        assert all(task.cancelled() or isinstance(task.exception(), HomeAssistantError) for task in done)
+
+    async def test_apply_batches_one_confirmation(self, coordinator, gated):
+        """A batch should be sent in order and confirmed by one refresh."""
+        gate, sent, confirmations = gated
+        gate.set()
+        await coordinator.async_apply([
+            ("SYS1", KlereoCommand(COMMAND_OUTPUT, 0, (0, 1))),
+            ("SYS1", KlereoCommand(COMMAND_OUTPUT, 1, (0, 1))),
+        ])
+        assert sent == [(0, 0, 1), (1, 0, 1)]
+        assert len(confirmations) == 1
+
+    async def test_apply_reports_failures(self, coordinator, gated):
+        """Failed commands in a batch should be listed in one error."""
+        gate, sent, _ = gated
+        gate.set()
+        with pytest.raises(HomeAssistantError, match="output_1"):
+            await coordinator.async_apply([
+                ("SYS1", KlereoCommand(COMMAND_OUTPUT, 0, (0, 1))),
+                ("SYS1", KlereoCommand(COMMAND_OUTPUT, 1, (0, 9))),
+            ])
+        assert sent == [(0, 0, 1), (1, 0, 9)]
+
+    async def test_apply_unknown_system(self, coordinator, gated):
+        """An unknown pool should fail the batch before anything is sent."""
+        _, sent, _ = gated
+        with pytest.raises(HomeAssistantError):
+            await coordinator.async_apply([
+                ("SYS1", KlereoCommand(COMMAND_OUTPUT, 0, (0, 1))),
+                ("NOPE", KlereoCommand(COMMAND_OUTPUT, 0, (0, 1))),
+            ])
+        assert sent == []
+
+
+def test_confirm_delays_back_off_until_timeout():
+    """Confirmation waits should double and add up to the timeout."""
+    assert list(_confirm_delays(30, 300)) == [30, 60, 120, 90]
+    assert list(_confirm_delays(0, 20)) == [0, 5, 10, 5]
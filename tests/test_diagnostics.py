@@ -35,6 +35,7 @@ class TestDiagnostics:
         result = await async_get_config_entry_diagnostics(hass, entry)
         assert "config_entry" in result
         assert "coordinator_data" in result
+        assert "circuit_breakers" in result
 
     async def test_redacts_sensitive_fields(self):
         """Password and token fields should be redacted."""
@@ -54,6 +55,32 @@ class TestDiagnostics:
         assert config["data"]["jwt"] == "**REDACTED**"
         assert config["data"]["login"] == "**REDACTED**"
 
+    async def test_raw_payloads_only_when_kept(self):
+        """Raw responses should only appear, redacted, with keep_raw_payloads."""
+        hass = MagicMock()
+        entry = MagicMock()
+        entry.as_dict.return_value = {"data": {}, "options": {}}
+        system_coordinator = MagicMock()
+        system_coordinator.scheduler = None
+        system_coordinator.cadence.as_dict.return_value = {}
+        system_coordinator.raw_details = {"response": [{"token": "abc"}]}
+        coordinator = MagicMock()
+        coordinator.data = {}
+        coordinator.system_coordinators = {"SYS1": system_coordinator}
+        coordinator.raw_index = {"SYS1": {"idSystem": "SYS1"}}
+        coordinator.keep_raw_payloads = False
+        hass.data = {"klereo": {entry.entry_id: coordinator}}
+
+        result = await async_get_config_entry_diagnostics(hass, entry)
+        assert result["system_coordinators"]["SYS1"]["raw_payloads"] == {}
+
+        coordinator.keep_raw_payloads = True
+        result = await async_get_config_entry_diagnostics(hass, entry)
+        assert result["system_coordinators"]["SYS1"]["raw_payloads"] == {
+            "index": {"idSystem": "SYS1"},
+            "details": {"response": [{"token": "**REDACTED**"}]},
+        }
+
     def test_to_redact_contains_expected_keys(self):
         """TO_REDACT should include all sensitive field names."""
         assert "password" in TO_REDACT
@@ -0,0 +1,89 @@
+"""Tests for the shared Klereo entity helpers."""
+from functools import partial
+from unittest.mock import MagicMock, patch
+
+from custom_components.klereo.const import DOMAIN
+from custom_components.klereo.entity import setup_discovery
+from custom_components.klereo.models import (
+    KlereoOutput,
+    KlereoPoolDetails,
+    KlereoSystemData,
+    KlereoSystemInfo,
+    KlereoTopologyDiff,
+)
+
+
+def _system(*indexes: int) -> KlereoSystemData:
+    """Create a pool with one output per index."""
+    outs = [KlereoOutput(index=i) for i in indexes]
+    return KlereoSystemData(
+        info=KlereoSystemInfo(id_system="SYS1"),
+        details=KlereoPoolDetails(output_index={o.index: o for o in outs}),
+    )
+
+
+class TestSetupDiscovery:
+    """Tests for setup_discovery."""
+
+    def _setup(self, data):
+        coordinator = MagicMock()
+        coordinator.data = data
+        coordinator.topology_changes = {}
+        hass = MagicMock()
+        hass.data = {DOMAIN: {"entry": coordinator}}
+        entry = MagicMock()
+        entry.entry_id = "entry"
+        add_entities = MagicMock()
+        built = {}
+
+        def _factory(system_id, index):
+            entity = MagicMock()
+            entity.entity_id = f"switch.{system_id}_{index}"
+            built[index] = entity
+            return entity
+
+        def _extract(coordinator, system_id, details):
+            return [
+                (f"{system_id}_{o.index}", partial(_factory, system_id, o.index))
+                for o in details.outs
+            ]
+
+        extract = MagicMock(side_effect=_extract)
+        setup_discovery(hass, entry, add_entities, extract)
+        discover = coordinator.async_add_listener.call_args[0][0]
+        return coordinator, discover, extract, add_entities, built
+
+    def test_builds_only_new_entities(self):
+        """Entities should only be constructed for unknown unique IDs."""
+        data = {"SYS1": _system(0)}
+        coordinator, discover, _, add_entities, built = self._setup(data)
+        data["SYS1"] = _system(0, 1)
+        coordinator.topology_changes = {"SYS1": KlereoTopologyDiff()}
+        discover()
+        assert list(built) == [0, 1]
+        assert add_entities.call_args_list[-1][0][0] == [built[1]]
+
+    def test_scans_only_changed_pools(self):
+        """Updates without topology changes should not call the extractor."""
+        data = {"SYS1": _system(0)}
+        coordinator, discover, extract, _, _ = self._setup(data)
+        discover()
+        assert extract.call_count == 1
+        coordinator.topology_changes = {"SYS1": KlereoTopologyDiff()}
+        discover()
+        assert extract.call_count == 2
+
+    def test_removes_vanished_entities(self):
+        """Entities of vanished outputs and pools should leave the registry."""
+        data = {"SYS1": _system(0, 1)}
+        coordinator, discover, _, _, built = self._setup(data)
+        registry = MagicMock()
+        with patch("custom_components.klereo.entity.er.async_get", return_value=registry):
+            data["SYS1"] = _system(0)
+            coordinator.topology_changes = {"SYS1": KlereoTopologyDiff()}
+            discover()
+            registry.async_remove.assert_called_once_with(built[1].entity_id)
+            del data["SYS1"]
+            discover()
+            registry.async_remove.assert_called_with(built[0].entity_id)
+            assert registry.async_remove.call_count == 2
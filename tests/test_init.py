@@ -0,0 +1,36 @@
+"""Tests for the Klereo integration setup and services."""
+import pytest
+import voluptuous as vol
+
+from custom_components.klereo import APPLY_SCHEMA
+
+
+def _output(**overrides):
+    return {"system_id": "SYS1", "index": 0, "mode": 0, "state": 1, **overrides}
+
+
+class TestApplySchema:
+    """Tests for the klereo.apply service schema."""
+
+    def test_valid_output(self):
+        """Known modes and on/off states should be accepted and coerced."""
+        data = APPLY_SCHEMA({"outputs": [_output(mode="3", state="0")]})
+        assert data["outputs"][0]["mode"] == 3
+        assert data["outputs"][0]["state"] == 0
+        assert data["params"] == []
+
+    @pytest.mark.parametrize("overrides", [{"mode": 9}, {"mode": -1}, {"state": 5}])
+    def test_out_of_range_output_rejected(self, overrides):
+        """Unknown modes and states should not reach the cloud."""
+        with pytest.raises(vol.Invalid):
+            APPLY_SCHEMA({"outputs": [_output(**overrides)]})
+
+    @pytest.mark.parametrize(
+        ("value", "expected"), [(1, 1), (28.5, 28.5), ("auto", "auto")]
+    )
+    def test_param_value_types_kept(self, value, expected):
+        """Integer parameters should stay integers, not become floats."""
+        data = APPLY_SCHEMA({"params": [{"system_id": "SYS1", "key": "Mode", "value": value}]})
+        result = data["params"][0]["value"]
+        assert result == expected
+        assert type(result) is type(expected)
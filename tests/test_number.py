@@ -1,7 +1,9 @@
 """Tests for Klereo number entities."""
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from homeassistant.exceptions import HomeAssistantError
 
 from custom_components.klereo.models import (
     KlereoPoolDetails,
@@ -16,12 +18,11 @@ def mock_coordinator():
     """Create a mock coordinator."""
     coordinator = MagicMock()
     coordinator.async_set_param = AsyncMock()
+    coordinator.number_debounce = 0
     coordinator.data = {
         "SYS1": KlereoSystemData(
             info=KlereoSystemInfo(id_system="SYS1", pool_nickname="My Pool"),
             details=KlereoPoolDetails(
-                probes=[],
-                outs=[],
                 regul_modes={"ConsigneEau": 28, "ModeFiltration": 1},
                 probe_index={},
                 output_index={},
@@ -80,3 +81,64 @@ class TestKlereoNumber:
         info = number.device_info
         assert ("klereo", "SYS1") in info["identifiers"]
         assert info["name"] == "My Pool"
+
+
+class TestDebouncedWrites:
+    """Tests for debounced setpoint writes."""
+
+    @pytest.fixture
+    async def number(self, mock_coordinator):
+        """Create a number entity with a short debounce window."""
+        mock_coordinator.number_debounce = 0.01
+        number = KlereoNumber(mock_coordinator, "SYS1", "ConsigneEau", 28)
+        number.hass = MagicMock()
+        number.hass.loop = asyncio.get_running_loop()
+        number.hass.async_create_task.side_effect = asyncio.ensure_future
+        number.async_write_ha_state = MagicMock()
+        return number
+
+    async def test_sends_only_last_value(self, number, mock_coordinator):
+        """Rapid steps within the window should produce a single write."""
+        await asyncio.gather(*(
+            number.async_set_native_value(value) for value in (28.5, 29.0, 29.5)
+        ))
+        mock_coordinator.async_set_param.assert_called_once_with("SYS1", "ConsigneEau", 29.5)
+        assert number._attr_native_value == 29.5
+
+    async def test_shows_pending_value_during_window(self, number, mock_coordinator):
+        """The pending value should be shown, even across a coordinator update."""
+        task = asyncio.ensure_future(number.async_set_native_value(30.0))
+        await asyncio.sleep(0)
+        assert number._attr_native_value == 30.0
+        number._handle_coordinator_update()
+        assert number._attr_native_value == 30.0
+        mock_coordinator.async_set_param.assert_not_called()
+        await task
+
+    async def test_rolls_back_when_final_write_fails(self, number, mock_coordinator):
+        """A failed final write should restore the value from before the window."""
+        mock_coordinator.async_set_param.side_effect = HomeAssistantError("down")
+        results = await asyncio.gather(
+            number.async_set_native_value(29.0),
+            number.async_set_native_value(30.0),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, HomeAssistantError) for result in results)
+        assert number._attr_native_value == 28
+        mock_coordinator.async_set_param.assert_called_once()
+
+    async def test_cancelled_write_releases_callers(self, number, mock_coordinator):
+        """Callers should not hang when the queued write is cancelled on unload."""
+        mock_coordinator.async_set_param.side_effect = asyncio.CancelledError
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(number.async_set_native_value(29.0), 1)
+
+    async def test_unexpected_error_releases_callers(self, number, mock_coordinator):
+        """A non-Home Assistant error should reach every caller in the window."""
+        mock_coordinator.async_set_param.side_effect = RuntimeError("boom")
+        results = await asyncio.wait_for(asyncio.gather(
+            number.async_set_native_value(29.0),
+            number.async_set_native_value(30.0),
+            return_exceptions=True,
+        ), 1)
+        assert all(isinstance(result, RuntimeError) for result in results)
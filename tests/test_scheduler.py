@@ -0,0 +1,177 @@
+"""Tests for the adaptive poll scheduler."""
+from datetime import timedelta
+
+import pytest
+
+from custom_components.klereo.const import CADENCE_FETCH_MARGIN, CADENCE_MAX_MISSES
+from custom_components.klereo.models import (
+    KlereoOutput,
+    KlereoPoolDetails,
+    KlereoProbe,
+    KlereoSystemData,
+    KlereoSystemInfo,
+)
+from custom_components.klereo.scheduler import (
+    STATE_ACTIVE,
+    STATE_CHANGED,
+    STATE_IDLE,
+    STATE_STEADY,
+    STATE_WINTER,
+    AdaptivePollScheduler,
+    UploadCadenceTracker,
+)
+
+BASE = timedelta(minutes=5)
+MIN = timedelta(minutes=1)
+MAX = timedelta(minutes=30)
+
+
+def _data(outs=(), probes=(), pool_mode=None) -> KlereoSystemData:
+    """Build system data with the given outputs and probes."""
+    outs = [KlereoOutput(index=i, status=s) for i, s in outs]
+    probes = [KlereoProbe(index=i, filtered_value=v) for i, v in probes]
+    return KlereoSystemData(
+        info=KlereoSystemInfo(id_system="SYS1"),
+        details=KlereoPoolDetails(
+            pool_mode=pool_mode,
+            probe_index={p.index: p for p in probes},
+            output_index={o.index: o for o in outs},
+        ),
+    )
+
+
+@pytest.fixture
+def scheduler():
+    """Create a scheduler with 1–30 minute bounds around 5 minutes."""
+    return AdaptivePollScheduler(BASE, MIN, MAX)
+
+
+class TestAdaptivePollScheduler:
+    """Tests for AdaptivePollScheduler.next_interval."""
+
+    def test_first_poll_uses_base(self, scheduler):
+        """The first poll has nothing to compare against."""
+        assert scheduler.next_interval(None, _data()) == BASE
+
+    def test_output_switch_polls_fast(self, scheduler):
+        """A switched output should drop to the minimum interval."""
+        previous = _data(outs=[(0, 0)])
+        assert scheduler.next_interval(previous, _data(outs=[(0, 1)])) == MIN
+        assert scheduler.state == STATE_ACTIVE
+
+    def test_running_filtration_polls_fast(self, scheduler):
+        """Running filtration keeps the minimum interval even when unchanged."""
+        data = _data(outs=[(1, 1)])
+        assert scheduler.next_interval(data, data) == MIN
+
+    def test_probe_change_uses_base(self, scheduler):
+        """A probe change without output activity keeps the base interval."""
+        previous = _data(probes=[(0, 28.0)])
+        assert scheduler.next_interval(previous, _data(probes=[(0, 28.5)])) == BASE
+        assert scheduler.state == STATE_CHANGED
+
+    def test_backs_off_when_unchanged(self, scheduler):
+        """Unchanged polls should double the interval after the idle threshold."""
+        data = _data()
+        intervals = [scheduler.next_interval(data, data) for _ in range(4)]
+        assert intervals == [BASE, BASE, BASE * 2, BASE * 4]
+        assert scheduler.state == STATE_IDLE
+
+    def test_backoff_is_capped(self, scheduler):
+        """The idle interval should not exceed the maximum."""
+        data = _data()
+        for _ in range(10):
+            interval = scheduler.next_interval(data, data)
+        assert interval == MAX
+
+    def test_change_resets_backoff(self, scheduler):
+        """New data should return to the base interval."""
+        data = _data()
+        for _ in range(5):
+            scheduler.next_interval(data, data)
+        assert scheduler.next_interval(data, _data(probes=[(0, 1.0)])) == BASE
+        assert scheduler.next_interval(data, data) == BASE
+        assert scheduler.state == STATE_STEADY
+
+    def test_winter_mode_polls_slowly(self, scheduler):
+        """Winter mode should use the maximum interval."""
+        previous = _data(outs=[(1, 0)])
+        assert scheduler.next_interval(previous, _data(outs=[(1, 1)], pool_mode=4)) == MAX
+        assert scheduler.state == STATE_WINTER
+
+    def test_base_clamped_to_bounds(self):
+        """A base interval outside the bounds should be clamped."""
+        scheduler = AdaptivePollScheduler(timedelta(minutes=60), MIN, MAX)
+        assert scheduler.next_interval(None, _data()) == MAX
+
+
+def _learn(tracker, upload_period=900, upload_phase=100, poll_every=300, until=3000):
+    """Feed the tracker fixed-interval polls of a pool with regular uploads."""
+    last_seen = None
+    for now in range(0, until + 1, poll_every):
+        latest_upload = (now - upload_phase) // upload_period
+        tracker.observe(last_seen is not None and latest_upload != last_seen, now)
+        last_seen = latest_upload
+
+
+class TestUploadCadenceTracker:
+    """Tests for UploadCadenceTracker."""
+
+    def test_no_model_until_enough_samples(self):
+        """Alignment should wait for enough observed uploads."""
+        tracker = UploadCadenceTracker()
+        _learn(tracker, until=1500)
+        assert tracker.period is None
+        assert tracker.next_delay(300, 1500) is None
+
+    def test_learns_period_and_phase(self):
+        """The period and the latest upload bound should be learned."""
+        tracker = UploadCadenceTracker()
+        _learn(tracker)
+        assert tracker.period == 900
+        assert tracker.anchor == 3000
+        assert tracker.uncertainty == 300
+
+    def test_schedules_after_next_upload(self):
+        """The next poll should land just after the next unseen upload."""
+        tracker = UploadCadenceTracker()
+        _learn(tracker)
+        assert tracker.next_delay(300, 3000) == 900 + CADENCE_FETCH_MARGIN
+
+    def test_keeps_poll_rate_when_uploads_are_frequent(self):
+        """With uploads faster than polls, the delay stays within the interval."""
+        tracker = UploadCadenceTracker()
+        _learn(tracker, upload_period=120, upload_phase=10, poll_every=60, until=1200)
+        delay = tracker.next_delay(600, 1200)
+        assert 0 < delay <= 600
+
+    def test_missed_aligned_poll_falls_back_to_interval(self):
+        """An aligned poll without new data should not be re-aligned at once."""
+        tracker = UploadCadenceTracker()
+        _learn(tracker)
+        now = 3000 + tracker.next_delay(300, 3000)
+        tracker.observe(False, now)
+        assert tracker.next_delay(300, now) is None
+
+    def test_repeated_misses_reset_model(self):
+        """Repeated aligned polls without new data should drop the model."""
+        tracker = UploadCadenceTracker()
+        _learn(tracker)
+        now = 3000
+        for _ in range(CADENCE_MAX_MISSES):
+            now += tracker.next_delay(300, now)
+            tracker.observe(False, now)
+            now += 300
+            tracker.observe(False, now)
+        assert tracker.period is None
+        assert tracker.as_dict(now)["samples"] == 0
+
+    def test_interrupt_skips_next_bracket(self):
+        """After an interrupt, the next change should not become a sample."""
+        tracker = UploadCadenceTracker()
+        tracker.observe(False, 0)
+        tracker.interrupt()
+        tracker.observe(True, 300)
+        assert tracker.as_dict(300)["samples"] == 0
+        tracker.observe(True, 600)
+        assert tracker.as_dict(600)["samples"] == 1
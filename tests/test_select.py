@@ -19,7 +19,7 @@ from custom_components.klereo.select import KlereoOutputModeSelect
 
 def _make_output(**kwargs) -> KlereoOutput:
     """Create a KlereoOutput with defaults."""
-    defaults = {"index": 0, "status": 1, "mode": 0, "type": 0}
+    defaults = {"index": 0, "status": 1, "mode": 0}
     defaults.update(kwargs)
     return KlereoOutput(**defaults)
 
@@ -34,8 +34,6 @@ def mock_coordinator():
         "SYS1": KlereoSystemData(
             info=KlereoSystemInfo(id_system="SYS1", pool_nickname="My Pool"),
             details=KlereoPoolDetails(
-                probes=[],
-                outs=[output],
                 regul_modes={},
                 probe_index={},
                 output_index={0: output},
@@ -150,3 +148,4 @@ class TestKlereoOutputModeSelect:
         select.async_write_ha_state = MagicMock()
         with pytest.raises(HomeAssistantError, match="Failed to set output"):
             await select.async_select_option("Regulation")
+        assert select.current_option == "Manual"
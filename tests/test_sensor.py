@@ -1,7 +1,9 @@
 """Tests for Klereo sensor entities."""
+from dataclasses import replace
 from unittest.mock import MagicMock
 
 import pytest
+from homeassistant.const import EntityCategory
 
 from custom_components.klereo.models import (
     KlereoPoolDetails,
@@ -9,7 +11,11 @@ from custom_components.klereo.models import (
     KlereoSystemData,
     KlereoSystemInfo,
 )
-from custom_components.klereo.sensor import KlereoParamSensor, KlereoSensor
+from custom_components.klereo.sensor import (
+    KlereoParamSensor,
+    KlereoProbeStatusSensor,
+    KlereoSensor,
+)
 
 
 def _make_probe(**kwargs) -> KlereoProbe:
@@ -24,12 +30,12 @@ def mock_coordinator():
     """Create a mock coordinator."""
     probe = _make_probe()
     coordinator = MagicMock()
+    coordinator.sensor_filters = {}
+    coordinator.sensor_heartbeat = 3600
     coordinator.data = {
         "SYS1": KlereoSystemData(
             info=KlereoSystemInfo(id_system="SYS1", pool_nickname="My Pool"),
             details=KlereoPoolDetails(
-                probes=[probe],
-                outs=[],
                 regul_modes={"ConsigneEau": 28},
                 probe_index={0: probe},
                 output_index={},
@@ -83,6 +89,97 @@ class TestKlereoSensor:
         sensor = KlereoSensor(mock_coordinator, "MISSING", probe)
         assert sensor._find_my_probe() is None
 
+    def test_skips_write_when_state_unchanged(self, mock_coordinator):
+        """A new pool object with the same reading should not write state."""
+        sensor = KlereoSensor(mock_coordinator, "SYS1", _make_probe())
+        sensor.async_write_ha_state = MagicMock()
+        sensor._handle_coordinator_update()
+        attributes = sensor._attr_extra_state_attributes
+        system = mock_coordinator.data["SYS1"]
+        probe = _make_probe()
+        mock_coordinator.data["SYS1"] = KlereoSystemData(
+            info=system.info,
+            details=replace(system.details, probe_index={0: probe}),
+        )
+        sensor._handle_coordinator_update()
+        sensor.async_write_ha_state.assert_called_once()
+        assert sensor._attr_extra_state_attributes is attributes
+
+    def test_writes_when_value_changes(self, mock_coordinator):
+        """A changed reading should be written."""
+        sensor = KlereoSensor(mock_coordinator, "SYS1", _make_probe())
+        sensor.async_write_ha_state = MagicMock()
+        sensor._handle_coordinator_update()
+        system = mock_coordinator.data["SYS1"]
+        probe = _make_probe(filtered_value=29.0)
+        mock_coordinator.data["SYS1"] = KlereoSystemData(
+            info=system.info,
+            details=replace(system.details, probe_index={0: probe}),
+        )
+        sensor._handle_coordinator_update()
+        assert sensor.async_write_ha_state.call_count == 2
+
+
+class TestProbeStatus:
+    """Tests for probe status handling."""
+
+    def test_status_attribute_is_unrecorded(self, mock_coordinator):
+        """The status attribute should be excluded from the recorder."""
+        sensor = KlereoSensor(mock_coordinator, "SYS1", _make_probe(status=2))
+        assert sensor.extra_state_attributes == {"status": 2}
+        assert "status" in KlereoSensor._unrecorded_attributes
+
+    def test_status_sensor(self, mock_coordinator):
+        """The diagnostic status sensor should follow the probe status."""
+        sensor = KlereoProbeStatusSensor(mock_coordinator, "SYS1", _make_probe(status=0))
+        assert sensor._attr_name == "Water Temperature Status"
+        assert sensor._attr_unique_id == "SYS1_sensor_0_status"
+        assert sensor.entity_category == EntityCategory.DIAGNOSTIC
+        assert sensor.entity_registry_enabled_default is False
+        sensor.async_write_ha_state = MagicMock()
+        system = mock_coordinator.data["SYS1"]
+        probe = _make_probe(status=3)
+        mock_coordinator.data["SYS1"] = KlereoSystemData(
+            info=system.info,
+            details=replace(system.details, probe_index={0: probe}),
+        )
+        sensor._handle_coordinator_update()
+        assert sensor.native_value == 3
+
+
+class TestSensorFilter:
+    """Tests for probe deadbands, rounding and heartbeat."""
+
+    @pytest.fixture
+    def sensor(self, mock_coordinator):
+        """Create a water temperature sensor with a 0.2 °C deadband."""
+        mock_coordinator.sensor_filters = {5: (0.2, 1)}
+        return KlereoSensor(mock_coordinator, "SYS1", _make_probe(filtered_value=28.04))
+
+    def test_rounds_to_precision(self, sensor):
+        """Readings should be rounded to the type's precision."""
+        assert sensor.native_value == 28.0
+
+    def test_holds_value_within_deadband(self, sensor):
+        """Drift smaller than the deadband should not be published."""
+        sensor._update_from_probe(_make_probe(filtered_value=28.08))
+        assert sensor.native_value == 28.0
+        sensor._update_from_probe(_make_probe(filtered_value=28.12))
+        assert sensor.native_value == 28.0
+        sensor._update_from_probe(_make_probe(filtered_value=28.2))
+        assert sensor.native_value == 28.2
+
+    def test_heartbeat_publishes_drift(self, sensor, mock_coordinator):
+        """After the heartbeat, the latest value is published regardless."""
+        sensor._published_at -= 3600
+        sensor._update_from_probe(_make_probe(filtered_value=28.08))
+        assert sensor.native_value == 28.1
+
+    def test_unfiltered_type_passes_through(self, mock_coordinator):
+        """Types without a filter should publish raw readings."""
+        sensor = KlereoSensor(mock_coordinator, "SYS1", _make_probe(filtered_value=28.04))
+        assert sensor.native_value == 28.04
+
 
 class TestKlereoParamSensor:
     """Tests for KlereoParamSensor."""
@@ -1,4 +1,5 @@
 """Tests for Klereo switch entities."""
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -15,7 +16,7 @@ from custom_components.klereo.switch import KlereoSwitch
 
 def _make_output(**kwargs) -> KlereoOutput:
     """Create a KlereoOutput with defaults."""
-    defaults = {"index": 0, "status": 1, "mode": 0, "type": 0}
+    defaults = {"index": 0, "status": 1, "mode": 0}
     defaults.update(kwargs)
     return KlereoOutput(**defaults)
 
@@ -33,8 +34,6 @@ def mock_coordinator():
         "SYS1": KlereoSystemData(
             info=KlereoSystemInfo(id_system="SYS1", pool_nickname="My Pool"),
             details=KlereoPoolDetails(
-                probes=[],
-                outs=[output],
                 regul_modes={},
                 probe_index={},
                 output_index={0: output},
@@ -123,3 +122,79 @@ class TestKlereoSwitch:
         found = switch._find_my_output()
         assert found is not None
         assert found.status == 1
+
+    def test_unchanged_system_skips_state_write(self, mock_coordinator):
+        """A reused (unchanged) system object should not trigger a state write."""
+        output = _make_output()
+        switch = KlereoSwitch(mock_coordinator, "SYS1", output)
+        switch.async_write_ha_state = MagicMock()
+        switch._handle_coordinator_update()
+        switch._handle_coordinator_update()
+        switch.async_write_ha_state.assert_called_once()
+
+    def test_exposes_command_status(self, mock_coordinator):
+        """The confirmation outcome of the last command should be an attribute."""
+        system_coordinator = MagicMock()
+        system_coordinator.command_status = {"output_0": "pending"}
+        mock_coordinator.system_coordinators = {"SYS1": system_coordinator}
+        switch = KlereoSwitch(mock_coordinator, "SYS1", _make_output())
+        assert switch.extra_state_attributes == {"mode": 0, "command_status": "pending"}
+        system_coordinator.command_status = {}
+        assert "command_status" not in switch.extra_state_attributes
+
+    async def test_failed_command_rolls_back(self, mock_coordinator):
+        """A failed command should restore the previous state at once."""
+        from homeassistant.exceptions import HomeAssistantError
+        off = _make_output(status=0)
+        mock_coordinator.data["SYS1"].details.output_index[0] = off
+        switch = KlereoSwitch(mock_coordinator, "SYS1", off)
+        switch.async_write_ha_state = MagicMock()
+        switch._handle_coordinator_update()
+        mock_coordinator.async_set_output.side_effect = HomeAssistantError("API down")
+        with pytest.raises(HomeAssistantError):
+            await switch.async_turn_on()
+        assert switch.is_on is False
+        assert switch.async_write_ha_state.call_count == 3
+        switch._handle_coordinator_update()  # same KlereoSystemData object
+        assert switch.is_on is False
+
+    async def test_holds_state_through_refresh(self, mock_coordinator):
+        """A refresh during the command should not flip the optimistic state back."""
+        gate = asyncio.Event()
+
+        async def _set_output(*args):
+            await gate.wait()
+
+        mock_coordinator.async_set_output.side_effect = _set_output
+        off = _make_output(status=0)
+        mock_coordinator.data["SYS1"].details.output_index[0] = off
+        switch = KlereoSwitch(mock_coordinator, "SYS1", off)
+        switch.async_write_ha_state = MagicMock()
+        task = asyncio.ensure_future(switch.async_turn_on())
+        await asyncio.sleep(0)
+        switch._handle_coordinator_update()
+        assert switch.is_on is True
+        gate.set()
+        await task
+        assert switch._optimistic == {}
+
+    async def test_refresh_during_failed_command_sets_rollback(self, mock_coordinator):
+        """The pool state seen during the command should be what is restored."""
+        from homeassistant.exceptions import HomeAssistantError
+        gate = asyncio.Event()
+
+        async def _set_output(*args):
+            await gate.wait()
+            raise HomeAssistantError("API down")
+
+        mock_coordinator.async_set_output.side_effect = _set_output
+        switch = KlereoSwitch(mock_coordinator, "SYS1", _make_output(status=0))
+        switch.async_write_ha_state = MagicMock()
+        task = asyncio.ensure_future(switch.async_turn_on())
+        await asyncio.sleep(0)
+        switch._handle_coordinator_update()  # pool data says on
+        assert switch.is_on is True
+        gate.set()
+        with pytest.raises(HomeAssistantError):
+            await task
+        assert switch.is_on is True